@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the CLI scripts.
+
+Imports each script in a fresh interpreter (inside an empty temp directory)
+and fails if the median import time exceeds the budget, if a heavy
+dependency was loaded eagerly, or if the import created files.
+
+    python bench_startup.py [--runs 10] [--budget-ms 150]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+SCRIPTS = ["threads_tool.py", "threads_tool - Copy.py"]
+HEAVY_MODULES = ["playwright", "aiohttp", "requests", "rich.progress"]
+
+PROBE = """
+import importlib.util, json, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("cli_under_test", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "loaded": [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
+
+def bench_script(script: Path, runs: int) -> dict:
+    timings = []
+    loaded = set()
+    created = set()
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as cwd:
+            proc = subprocess.run(
+                [sys.executable, "-c", PROBE, str(script), *HEAVY_MODULES],
+                cwd=cwd, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"}
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            timings.append(result["ms"])
+            loaded.update(result["loaded"])
+            created.update(os.listdir(cwd))
+    return {"median_ms": statistics.median(timings), "loaded": sorted(loaded), "created": sorted(created)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    failed = False
+    for name in SCRIPTS:
+        result = bench_script(ROOT / name, args.runs)
+        if "error" in result:
+            print(f"[ERROR] {name}: {result['error']}")
+            failed = True
+            continue
+
+        problems = []
+        if result["median_ms"] > args.budget_ms:
+            problems.append(f"over budget ({args.budget_ms:.0f}ms)")
+        if result["loaded"]:
+            problems.append(f"eager imports: {', '.join(result['loaded'])}")
+        if result["created"]:
+            problems.append(f"import side effects: {', '.join(result['created'])}")
+
+        status = "FAIL" if problems else "OK"
+        print(f"[{status}] {name}: median {result['median_ms']:.1f}ms over {args.runs} runs" + (f" - {'; '.join(problems)}" if problems else ""))
+        failed = failed or bool(problems)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The tools are standalone scripts at the repo root, not an installed package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
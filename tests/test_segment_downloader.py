@@ -0,0 +1,239 @@
+import functools
+import http.server
+import os
+import re
+import threading
+
+import pytest
+
+from threads_tool import SegmentDownloader, dash_manifests_for_post, parse_dash_manifest, segments_from_captured_requests
+
+
+class FixtureHandler(http.server.SimpleHTTPRequestHandler):
+    """Static file server that records request methods; no Range support"""
+
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.requests_seen.append(("HEAD", self.path))
+        super().do_HEAD()
+
+    def do_GET(self):
+        self.requests_seen.append(("GET", self.path, self.headers.get("Range")))
+        super().do_GET()
+
+
+class RangeHandler(FixtureHandler):
+    """Static file server answering Range requests with 206 Partial Content"""
+
+    def end_headers(self):
+        self.send_header("Accept-Ranges", "bytes")
+        super().end_headers()
+
+    def do_GET(self):
+        match = re.match(r"bytes=(\d+)-(\d*)$", self.headers.get("Range") or "")
+        if not match:
+            return super().do_GET()
+        self.requests_seen.append(("GET", self.path, self.headers.get("Range")))
+        with open(self.translate_path(self.path), "rb") as f:
+            data = f.read()
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else len(data) - 1
+        body = data[start:end + 1]
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(directory, handler):
+    handler.requests_seen = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(handler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    (tmp_path / "init.mp4").write_bytes(b"ftypINIT")
+    for number in range(1, 4):
+        (tmp_path / f"seg_{number:05d}.m4s").write_bytes(f"moofSEG{number}".encode() * 100)
+    (tmp_path / "whole.mp4").write_bytes(os.urandom(10240))
+    return tmp_path
+
+
+@pytest.fixture
+def plain_server(fixtures):
+    server, base = serve(fixtures, FixtureHandler)
+    yield base
+    server.shutdown()
+
+
+@pytest.fixture
+def range_server(fixtures):
+    server, base = serve(fixtures, RangeHandler)
+    yield base
+    server.shutdown()
+
+
+def mpd(body, duration="PT6S", period_duration=None):
+    presentation = f' mediaPresentationDuration="{duration}"' if duration else ""
+    period = f' duration="{period_duration}"' if period_duration else ""
+    return (
+        '<?xml version="1.0"?>'
+        f'<MPD xmlns="urn:mpeg:dash:schema:mpd:2011"{presentation}><Period{period}>'
+        f"{body}</Period></MPD>"
+    )
+
+
+def test_segment_template_number_padding():
+    manifest = mpd(
+        '<AdaptationSet contentType="video" mimeType="video/mp4">'
+        '<SegmentTemplate initialization="init.mp4" media="seg_$Number%05d$.m4s" startNumber="1" timescale="1000" duration="2000"/>'
+        '<Representation id="v" bandwidth="1000"/></AdaptationSet>'
+    )
+    (rep,) = parse_dash_manifest(manifest, "http://cdn/path/manifest.mpd")
+    assert rep["content_type"] == "video"
+    assert rep["segments"] == [
+        ("http://cdn/path/init.mp4", None),
+        ("http://cdn/path/seg_00001.m4s", None),
+        ("http://cdn/path/seg_00002.m4s", None),
+        ("http://cdn/path/seg_00003.m4s", None),
+    ]
+
+
+def test_segment_timeline_repeats_and_time():
+    manifest = mpd(
+        '<AdaptationSet mimeType="video/mp4"><SegmentTemplate initialization="$RepresentationID$/init.mp4" '
+        'media="$RepresentationID$/$Time$.m4s" timescale="10">'
+        '<SegmentTimeline><S t="0" d="20" r="2"/><S d="5"/></SegmentTimeline></SegmentTemplate>'
+        '<Representation id="hd" bandwidth="900"/></AdaptationSet>'
+    )
+    (rep,) = parse_dash_manifest(manifest, "http://cdn/")
+    assert [url for url, _ in rep["segments"]] == [
+        "http://cdn/hd/init.mp4",
+        "http://cdn/hd/0.m4s",
+        "http://cdn/hd/20.m4s",
+        "http://cdn/hd/40.m4s",
+        "http://cdn/hd/60.m4s",
+    ]
+
+
+def test_segment_timeline_open_repeat_fills_period():
+    manifest = mpd(
+        '<AdaptationSet mimeType="video/mp4"><SegmentTemplate media="$Number$.m4s" timescale="10">'
+        '<SegmentTimeline><S t="0" d="20" r="-1"/></SegmentTimeline></SegmentTemplate>'
+        '<Representation id="v" bandwidth="1"/></AdaptationSet>'
+        '<AdaptationSet mimeType="audio/mp4"><SegmentTemplate media="a$Number$.m4s" timescale="10">'
+        '<SegmentTimeline><S t="0" d="20" r="-1"/><S t="40" d="10" r="-1"/></SegmentTimeline></SegmentTemplate>'
+        '<Representation id="a" bandwidth="0"/></AdaptationSet>',
+        duration="PT7S",
+    )
+    video, audio = parse_dash_manifest(manifest, "http://cdn/")
+    assert [url for url, _ in video["segments"]] == [f"http://cdn/{n}.m4s" for n in range(1, 5)]
+    # An open repeat stops at the next S@t
+    assert [url for url, _ in audio["segments"]] == [f"http://cdn/a{n}.m4s" for n in range(1, 6)]
+
+
+def test_template_duration_falls_back_to_period_duration():
+    template = (
+        '<AdaptationSet mimeType="video/mp4">'
+        '<SegmentTemplate initialization="init.mp4" media="$Number$.m4s" timescale="1" duration="2"/>'
+        '<Representation id="v" bandwidth="1"/></AdaptationSet>'
+    )
+    (rep,) = parse_dash_manifest(mpd(template, duration=None, period_duration="PT4S"), "http://cdn/")
+    assert [url for url, _ in rep["segments"]] == ["http://cdn/init.mp4", "http://cdn/1.m4s", "http://cdn/2.m4s"]
+    # Without any duration only the init segment is known: not a playable representation
+    assert parse_dash_manifest(mpd(template, duration=None), "http://cdn/") == []
+
+
+def test_segment_list_ranges_and_bandwidth_order():
+    manifest = mpd(
+        '<AdaptationSet mimeType="audio/mp4"><Representation id="a" bandwidth="64">'
+        "<BaseURL>audio.mp4</BaseURL></Representation></AdaptationSet>"
+        '<AdaptationSet mimeType="video/mp4"><Representation id="v" bandwidth="2000">'
+        '<BaseURL>video.mp4</BaseURL><SegmentList><Initialization sourceURL="video.mp4" range="0-99"/>'
+        '<SegmentURL mediaRange="100-199"/><SegmentURL media="video.mp4" mediaRange="200-299"/></SegmentList>'
+        "</Representation></AdaptationSet>"
+    )
+    video, audio = parse_dash_manifest(manifest, "http://cdn/m.mpd")
+    assert video["segments"] == [
+        ("http://cdn/video.mp4", "0-99"),
+        ("http://cdn/video.mp4", "100-199"),
+        ("http://cdn/video.mp4", "200-299"),
+    ]
+    assert audio["content_type"] == "audio"
+    assert audio["segments"] == [("http://cdn/audio.mp4", None)]
+
+
+def test_captured_requests_pick_largest_video_resource():
+    captured = [
+        ("https://cdn/v.mp4?efg=1&bytestart=0&byteend=999", "video/mp4"),
+        ("https://cdn/v.mp4?efg=1&bytestart=1000&byteend=5000", "video/mp4"),
+        ("https://cdn/small.mp4?bytestart=0&byteend=10", "video/mp4"),
+        ("https://cdn/a.mp4?bytestart=0&byteend=99999", "audio/mp4"),
+        ("https://cdn/thumb.jpg", "image/jpeg"),
+    ]
+    assert segments_from_captured_requests(captured) == [("https://cdn/v.mp4?efg=1", None)]
+    assert segments_from_captured_requests([("https://cdn/thumb.jpg", "image/jpeg")]) == []
+
+
+def test_captured_requests_pick_audio_resource():
+    captured = [
+        ("https://cdn/v.mp4?bytestart=0&byteend=5000", "video/mp4"),
+        ("https://cdn/a.mp4?bytestart=0&byteend=999", "audio/mp4"),
+        ("https://cdn/a.mp4?bytestart=1000&byteend=1999", "audio/mp4"),
+    ]
+    assert segments_from_captured_requests(captured, "audio") == [("https://cdn/a.mp4", None)]
+
+
+def test_embedded_manifests_are_tied_to_the_post():
+    source = (
+        '{"code":"REPLY1","video_dash_manifest":"<MPD reply/>"},'
+        '{"video_dash_manifest":"<MPD target\\/>","code":"TARGET"},'
+        '{"code":"SUGGESTED","video_dash_manifest":"<MPD suggested/>"}'
+    )
+    assert dash_manifests_for_post(source, "TARGET") == ["<MPD target/>"]
+    assert dash_manifests_for_post(source, "MISSING") == []
+    assert len(dash_manifests_for_post(source, "")) == 3
+
+
+@pytest.mark.parametrize("server", ["plain_server", "range_server"])
+def test_download_concatenates_template_segments(request, fixtures, server, tmp_path_factory):
+    base = request.getfixturevalue(server)
+    segments = [(base + "init.mp4", None)] + [(base + f"seg_{n:05d}.m4s", None) for n in range(1, 4)]
+    dest = tmp_path_factory.mktemp("out") / "video.mp4"
+
+    written = SegmentDownloader(workers=3).download(segments, str(dest))
+
+    expected = b"".join((fixtures / url.rsplit("/", 1)[1]).read_bytes() for url, _ in segments)
+    assert dest.read_bytes() == expected
+    assert written == len(expected)
+    # Multi-segment manifests are fetched directly, without serial HEAD probes
+    assert not [r for r in FixtureHandler.requests_seen + RangeHandler.requests_seen if r[0] == "HEAD"]
+
+
+@pytest.mark.parametrize("server", ["plain_server", "range_server"])
+def test_download_media_ranges(request, fixtures, server, tmp_path_factory):
+    base = request.getfixturevalue(server)
+    segments = [(base + "whole.mp4", "0-1023"), (base + "whole.mp4", "1024-5119"), (base + "whole.mp4", "5120-10239")]
+    dest = tmp_path_factory.mktemp("out") / "video.mp4"
+
+    SegmentDownloader(workers=2).download(segments, str(dest))
+
+    # A server ignoring Range must not get the whole file concatenated three times
+    assert dest.read_bytes() == (fixtures / "whole.mp4").read_bytes()
+
+
+def test_single_resource_split_into_parallel_ranges(fixtures, range_server, tmp_path):
+    dest = tmp_path / "video.mp4"
+
+    SegmentDownloader(workers=4, part_size=3000).download([(range_server + "whole.mp4", None)], str(dest))
+
+    assert dest.read_bytes() == (fixtures / "whole.mp4").read_bytes()
+    ranges = [r[2] for r in RangeHandler.requests_seen if r[0] == "GET"]
+    assert sorted(ranges) == ["bytes=0-2999", "bytes=3000-5999", "bytes=6000-8999", "bytes=9000-10239"]
@@ -0,0 +1,27 @@
+import json
+
+from threads_tool import StrategyStats
+
+
+def test_recent_misses_outrank_lifetime_hits(tmp_path):
+    stats = StrategyStats(str(tmp_path / "stats.json"))
+    for _ in range(1000):
+        stats.record("selector:old", True, 0.1)
+    for _ in range(30):
+        stats.record("selector:old", False, 0.1)
+        stats.record("selector:new", True, 0.1)
+
+    assert stats.rank(["selector:old", "selector:new"], [0.1, 0.1]) == ["selector:new", "selector:old"]
+    (key, attempts, hits, rate, seconds), _ = stats.report()
+    assert (key, attempts, hits) == ("selector:new", 30, 30)
+    assert stats.report()[1][3] < 0.1
+
+
+def test_loads_totals_written_without_weighted_averages(tmp_path):
+    path = tmp_path / "stats.json"
+    path.write_text(json.dumps({"strategy:dom": {"attempts": 8, "hits": 3, "seconds": 4.0}}))
+
+    stats = StrategyStats(str(path))
+
+    assert stats.hit_rate("strategy:dom") == 0.4
+    assert stats.latency("strategy:dom", prior=9.0) == 0.5
@@ -10,22 +10,31 @@ r"""
 """
 
 import asyncio
+import gzip
+import hashlib
+import json
+import math
+import os
+import queue
 import re
 import sys
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 
-import aiohttp
 import typer
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
-from playwright.async_api import async_playwright
+
+# aiohttp, playwright & rich.progress di-import di dalam fungsi yang memakainya (startup cepat)
+if TYPE_CHECKING:
+    import aiohttp
 
 # === Setup logging ke file ===
 LOG_DIR = Path("logs")
-LOG_DIR.mkdir(exist_ok=True)
-log_file = LOG_DIR / f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
 
 class Tee:
     def __init__(self, *files):
@@ -38,18 +47,59 @@ class Tee:
         for f in self.files:
             f.flush()
 
-log_fh = open(log_file, "w", encoding="utf-8")
-sys.stdout = Tee(sys.stdout, log_fh)
-sys.stderr = Tee(sys.stderr, log_fh)
-
-print(f"[LOG] Semua output disimpan di {log_file}")
+def setup_logging():
+    """Buat folder logs & arahkan stdout/stderr ke file log; dipanggil saat command jalan, bukan saat import."""
+    LOG_DIR.mkdir(exist_ok=True)
+    log_file = LOG_DIR / f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    log_fh = open(log_file, "w", encoding="utf-8")
+    sys.stdout = Tee(sys.stdout, log_fh)
+    sys.stderr = Tee(sys.stderr, log_fh)
+    print(f"[LOG] Semua output disimpan di {log_file}")
 
 # === CLI setup ===
 app = typer.Typer(help="Scrape & download Threads videos (threads.net & threads.com).")
 console = Console()
 
 OUTPUT_DIR = Path("downloads")
-OUTPUT_DIR.mkdir(exist_ok=True)
+
+class Tracer:
+    """Rekam span bertingkat sebagai Chrome trace-event JSON (buka di chrome://tracing / Perfetto)."""
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.pid = os.getpid()
+    def add(self, name: str, cat: str, start_ns: int, end_ns: int, tid: int = 0, **args):
+        if self.enabled:
+            self.events.append({
+                "name": name, "cat": cat, "ph": "X",
+                "ts": start_ns / 1000, "dur": (end_ns - start_ns) / 1000,
+                "pid": self.pid, "tid": tid, "args": args,
+            })
+    @contextmanager
+    def span(self, name: str, cat: str = "scrape", tid: int = 0, **args):
+        if not self.enabled:
+            yield args
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            self.add(name, cat, start, time.perf_counter_ns(), tid, **args)
+    def save(self, path: Path):
+        path.write_text(json.dumps({"traceEvents": self.events, "displayTimeUnit": "ms"}), encoding="utf-8")
+        print(f"[TRACE] Timeline disimpan di {path} (chrome://tracing / ui.perfetto.dev)")
+
+tracer = Tracer()
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    trace: Path = typer.Option(None, "--trace", help="Simpan timeline span (Chrome trace-event JSON) ke file ini"),
+):
+    setup_logging()
+    if trace:
+        tracer.enabled = True
+        ctx.call_on_close(lambda: tracer.save(trace))
 
 # Regex patterns
 RE_CDN_IG = re.compile(r"https://(?:scontent|video)\.cdninstagram\.com/[^\"'\\\s]+", re.IGNORECASE)
@@ -66,51 +116,269 @@ def normalize_urls(urls):
             out.append(u)
     return out
 
+class BloomFilter:
+    """Bloom filter yang bisa membesar: tambah layer (kapasitas 2x, error 1/2) saat layer terakhir penuh,
+    jadi false positive total tetap < error_rate berapa pun jumlah URL-nya."""
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 1e-6):
+        self.layers = []
+        self.duplicates = 0
+        self._add_layer(max(1, capacity), error_rate / 2)
+    def _add_layer(self, capacity: int, error_rate: float):
+        num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self.layers.append([capacity, error_rate, 0, num_bits, num_hashes, bytearray((num_bits + 7) // 8)])
+    @staticmethod
+    def _positions(layer, h1: int, h2: int):
+        num_bits, num_hashes = layer[3], layer[4]
+        for i in range(num_hashes):  # enhanced double hashing, hindari posisi yang berulang
+            yield h1 % num_bits
+            h1 += h2
+            h2 += i
+    def add(self, item: str) -> bool:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for layer in self.layers:
+            if all(layer[5][p >> 3] & (1 << (p & 7)) for p in self._positions(layer, h1, h2)):
+                self.duplicates += 1
+                return True
+        layer = self.layers[-1]
+        if layer[2] >= layer[0]:
+            self._add_layer(layer[0] * 2, layer[1] / 2)
+            layer = self.layers[-1]
+        for p in self._positions(layer, h1, h2):
+            layer[5][p >> 3] |= 1 << (p & 7)
+        layer[2] += 1
+        return False
+
+def iter_url_lines(file_path: Path):
+    """Baca URL baris per baris (file biasa, .gz, atau '-' untuk stdin) tanpa load semua."""
+    if str(file_path) == "-":
+        yield from sys.stdin
+        return
+    opener = gzip.open if file_path.suffix == ".gz" else open
+    with opener(file_path, "rt", encoding="utf-8") as fh:
+        yield from fh
+
+def dedupe_stream(lines, capacity: int = 1_000_000):
+    seen = BloomFilter(capacity)
+    for line in lines:
+        u = line.strip()
+        if u and not seen.add(u):
+            yield u
+    if seen.duplicates:
+        console.log(f"[yellow]{seen.duplicates} URL duplikat dilewati[/yellow]")
+
 async def extract_urls_from_html(html: str):
     candidates = []
-    candidates += RE_CDN_IG.findall(html)
-    candidates += RE_GENERIC_MP4.findall(html)
-    candidates += RE_VIDEO_TAG.findall(html)
-    candidates += RE_SOURCE_TAG.findall(html)
+    for name, pattern in (
+        ("RE_CDN_IG", RE_CDN_IG),
+        ("RE_GENERIC_MP4", RE_GENERIC_MP4),
+        ("RE_VIDEO_TAG", RE_VIDEO_TAG),
+        ("RE_SOURCE_TAG", RE_SOURCE_TAG),
+    ):
+        with tracer.span(f"regex {name}", cat="regex") as span:
+            found = pattern.findall(html)
+            span["matches"] = len(found)
+        candidates += found
     candidates = [u for u in candidates if "analytics" not in u and "metric" not in u]
     return normalize_urls(candidates)
 
-async def scroll_to_bottom(page, max_rounds: int, wait_ms: int):
-    prev_height = 0
-    for _ in range(max_rounds):
-        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-        await page.wait_for_timeout(wait_ms)
-        height = await page.evaluate("document.body.scrollHeight")
-        if height == prev_height:
-            break
-        prev_height = height
+# Cari 1 card per post (article / list item / pressable container terdekat, kalau tidak ada: ancestor
+# terbesar yang cuma berisi link post itu) dalam satu pass linear. Card yang sudah lewat di atas viewport
+# diambil HTML-nya (buat regex URL), lalu mode 'detach' menggantinya dengan placeholder kosong setinggi
+# card (DOM tidak terus membesar, posisi scroll tetap); mode 'media' (fallback kalau page error karena
+# node React hilang) cuma melepas media-nya. ID yang sudah dipanen disimpan di window.__sedotSeen;
+# setelah reload Python mengisinya lagi sebagai cursor, card lama cukup dibuang tanpa dipanen ulang.
+HARVEST_CARDS_JS = """
+(mode) => {
+    const seen = window.__sedotSeen = window.__sedotSeen || new Set();
+    const postId = href => {
+        const m = href.match(/\\/post\\/([^\\/?#]+)/);
+        return m ? m[1] : null;
+    };
+    const CARD_BOUNDARY = 'article, li, [role="article"], [role="listitem"], [data-pressable-container]';
+    const idsUnder = new Map();
+    const firstLink = new Map();
+    document.querySelectorAll('a[href*="/post/"]').forEach(a => {
+        const id = postId(a.href);
+        if (!id) return;
+        if (!firstLink.has(id)) firstLink.set(id, a);
+        for (let el = a.parentElement; el && el !== document.body; el = el.parentElement) {
+            let ids = idsUnder.get(el);
+            if (!ids) idsUnder.set(el, ids = new Set());
+            ids.add(id);
+        }
+    });
+    const html = [];
+    const urls = [];
+    const done = [];
+    let removed = 0;
+    firstLink.forEach((a, id) => {
+        let card = a.closest(CARD_BOUNDARY);
+        if (!card || card === document.body) {
+            card = a;
+            while (card.parentElement && card.parentElement !== document.body && idsUnder.get(card.parentElement).size <= 1) {
+                card = card.parentElement;
+            }
+        }
+        if (card.hasAttribute('data-sedot-pruned') || card.getBoundingClientRect().bottom >= 0) return;
+        if (!seen.has(id)) {
+            seen.add(id);
+            done.push(id);
+            card.querySelectorAll('video').forEach(v => { if (v.currentSrc) urls.push(v.currentSrc); });
+            html.push(card.outerHTML);
+        }
+        card.querySelectorAll('video').forEach(v => { v.pause(); v.removeAttribute('src'); v.load(); });
+        if (mode === 'detach') {
+            const placeholder = document.createElement('div');
+            placeholder.style.height = card.getBoundingClientRect().height + 'px';
+            placeholder.setAttribute('data-sedot-pruned', id);
+            card.replaceWith(placeholder);
+        } else {
+            card.querySelectorAll('img').forEach(img => { img.removeAttribute('srcset'); img.removeAttribute('src'); });
+            card.setAttribute('data-sedot-pruned', id);
+        }
+        removed++;
+    });
+    return {
+        ids: [...firstLink.keys()],
+        done,
+        html,
+        urls,
+        removed,
+        heap: performance.memory ? performance.memory.usedJSHeapSize : 0,
+    };
+}
+"""
+
+async def scroll_to_bottom(
+    page,
+    max_rounds: int,
+    wait_ms: int,
+    long_scroll: bool = False,
+    heap_limit_mb: int = 512,
+    stall_rounds: int = 3,
+    max_reloads: int = 5,
+) -> list:
+    """Scroll feed. Mode long_scroll: tanpa batas ronde, card yang sudah dipanen diganti placeholder
+    (atau cuma dilepas media-nya kalau page error), reload (maks max_reloads) saat heap JS lewat batas
+    atau setelah page error, lalu lanjut dari cursor ID yang sudah dipanen."""
+    if not long_scroll:
+        prev_height = 0
+        for rounds in range(1, max_rounds + 1):
+            with tracer.span("scroll", round=rounds) as span:
+                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                await page.wait_for_timeout(wait_ms)
+                height = await page.evaluate("document.body.scrollHeight")
+                span["height"] = height
+            if height == prev_height:
+                break
+            prev_height = height
+        return []
+
+    known = set()      # semua post ID yang pernah terlihat (deteksi feed habis)
+    harvested = set()  # post ID yang HTML-nya sudah dipanen (cursor setelah reload)
+    urls = []
+    stalled = rounds = page_rounds = catchup = reloads = new_since_reload = detached = 0
+    mode = "detach"
+    page_errors = []
+    on_page_error = page_errors.append
+    page.on("pageerror", on_page_error)
+    try:
+        while stalled < stall_rounds:
+            rounds += 1
+            page_rounds += 1
+            with tracer.span("scroll", round=rounds) as span:
+                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                await page.wait_for_timeout(wait_ms)
+                result = await page.evaluate(HARVEST_CARDS_JS, mode)
+                span["removed"] = result["removed"]
+
+            urls += [u for u in result["urls"] if u.startswith("http")]
+            if result["html"]:
+                urls += await extract_urls_from_html("\n".join(result["html"]))
+            harvested.update(result["done"])
+            new_posts = len(set(result["ids"]) - known)
+            known.update(result["ids"])
+            new_since_reload += new_posts
+            if mode == "detach":
+                detached += result["removed"]
+
+            if new_posts:
+                stalled = catchup = 0
+            elif catchup > 0:
+                catchup -= 1
+            else:
+                stalled += 1
+
+            heap_mb = result["heap"] / (1024 * 1024)
+            reason = None
+            if page_errors and mode == "detach" and detached:
+                # React mungkin masih memegang card yang diganti placeholder; jangan sentuh node-nya lagi
+                console.log(f"[yellow]Page error setelah card dilepas ({page_errors[0]}), pindah ke mode lepas-media saja[/yellow]")
+                mode = "media"
+                reason = "page error"
+            elif heap_mb > heap_limit_mb:
+                reason = f"JS heap {heap_mb:.0f}MB > {heap_limit_mb}MB"
+            page_errors.clear()
+            if not reason:
+                continue
+
+            if reloads >= max_reloads or (reloads and not new_since_reload):
+                console.log(f"[yellow]{reason} setelah {reloads} reload, scroll dihentikan[/yellow]")
+                break
+            reloads += 1
+            console.log(f"[magenta]{reason}, reload {reloads}/{max_reloads}, lanjut setelah {len(harvested)} post[/magenta]")
+            await page.reload(wait_until="load")
+            await page.wait_for_timeout(2500)
+            await page.evaluate("ids => { window.__sedotSeen = new Set(ids); }", list(harvested))
+            catchup, page_rounds, new_since_reload = page_rounds, 0, 0
+    finally:
+        page.remove_listener("pageerror", on_page_error)
+    return normalize_urls(urls)
 
 async def scrape_with_playwright(
     target_url: str,
     headful: bool = False,
     scroll_max: int = 12,
     wait_ms: int = 2000,
-    debug: bool = False
+    debug: bool = False,
+    long_scroll: bool = False,
+    heap_limit_mb: int = 512,
+    playwright_trace: Path = None,
 ) -> list:
     parsed = urlparse(target_url)
     domain = parsed.hostname or ""
     mode = "threads.net" if "threads.net" in domain else "threads.com" if "threads.com" in domain else "generic"
 
+    from playwright.async_api import async_playwright
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=not headful)
         context = await browser.new_context(
             viewport={"width": 1280, "height": 800},
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122 Safari/537.36",
         )
+        if playwright_trace:
+            await context.tracing.start(screenshots=True, snapshots=True)
         page = await context.new_page()
 
         console.log(f"[cyan]Opening target:[/cyan] {target_url}")
-        await page.goto(target_url, timeout=90000, wait_until="load")
-        await page.wait_for_timeout(2500)
-
-        await scroll_to_bottom(page, max_rounds=scroll_max, wait_ms=wait_ms)
+        with tracer.span("goto", url=target_url):
+            await page.goto(target_url, timeout=90000, wait_until="load")
+        with tracer.span("wait_ready"):
+            await page.wait_for_timeout(2500)
+
+        scrolled_urls = await scroll_to_bottom(
+            page,
+            max_rounds=scroll_max,
+            wait_ms=wait_ms,
+            long_scroll=long_scroll,
+            heap_limit_mb=heap_limit_mb,
+        )
 
-        harvested = []
+        harvested = list(scrolled_urls)
         def on_response(resp):
             try:
                 url = resp.url
@@ -120,7 +388,13 @@ async def scrape_with_playwright(
                 pass
         page.on("response", on_response)
 
-        html = await page.content()
+        with tracer.span("page.content") as span:
+            html = await page.content()
+            span["bytes"] = len(html)
+
+        if playwright_trace:
+            await context.tracing.stop(path=playwright_trace)
+            console.log(f"[blue]Playwright trace:[/blue] {playwright_trace}")
 
         if debug:
             Path("debug_page.html").write_text(html, encoding="utf-8")
@@ -142,26 +416,160 @@ async def save_urls_to_file(urls: list, output_file: Path):
     output_file.write_text("\n".join(urls), encoding="utf-8")
     console.log(f"[green]Saved {len(urls)} URLs → {output_file}[/green]")
 
-async def download_one(session: aiohttp.ClientSession, url: str, dest: Path):
+class AsyncFileWriter:
+    """Tulis file di thread terpisah lewat antrean terbatas supaya disk lambat tidak memblok event loop."""
+    def __init__(self, dest: Path, size_hint: int = 0, buffer_size: int = 1024 * 1024, max_pending: int = 16):
+        self.dest = dest
+        self.size_hint = size_hint
+        self.buffer_size = buffer_size
+        self.pending: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.fh = None
+        self.thread = None
+
+    def _open(self):
+        self.fh = open(self.dest, "wb", buffering=self.buffer_size)
+        if self.size_hint > 0:
+            # Preallocate dari Content-Length; fallback ke file sparse kalau fallocate tidak ada
+            try:
+                os.posix_fallocate(self.fh.fileno(), 0, self.size_hint)
+            except (AttributeError, OSError):
+                self.fh.truncate(self.size_hint)
+
+    def _run(self):
+        while True:
+            chunk = self.pending.get()
+            if chunk is None:
+                return
+            if self.error is None:
+                try:
+                    self.fh.write(chunk)
+                except Exception as e:
+                    self.error = e
+
+    def _close(self):
+        try:
+            if self.error is None:
+                self.fh.truncate()  # buang sisa preallocate kalau ukuran asli lebih kecil
+        finally:
+            self.fh.close()
+
+    async def __aenter__(self):
+        await asyncio.to_thread(self._open)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    async def write(self, chunk: bytes):
+        if self.error is not None:
+            raise self.error
+        try:
+            self.pending.put_nowait(chunk)
+        except queue.Full:
+            await asyncio.to_thread(self.pending.put, chunk)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.to_thread(self.pending.put, None)
+        await asyncio.to_thread(self.thread.join)
+        await asyncio.to_thread(self._close)
+        if exc_type is None and self.error is not None:
+            raise self.error
+        return False
+
+async def download_one(
+    session: "aiohttp.ClientSession",
+    url: str,
+    dest: Path,
+    chunk_size: int = 256 * 1024,
+    write_buffer: int = 1024 * 1024,
+    tid: int = 0,
+):
+    with tracer.span("download", cat="http", tid=tid, url=url[:200]) as span:
+        try:
+            # connect & TTFB direkam lewat TraceConfig aiohttp (lihat http_trace_config)
+            async with session.get(url, timeout=120, trace_request_ctx={"tid": tid}) as resp:
+                resp.raise_for_status()
+                size_hint = resp.content_length or 0
+                with tracer.span("http.body", cat="http", tid=tid) as body:
+                    size = 0
+                    async with AsyncFileWriter(dest, size_hint=size_hint, buffer_size=write_buffer) as writer:
+                        async for chunk in resp.content.iter_chunked(chunk_size):
+                            if chunk:
+                                await writer.write(chunk)
+                                size += len(chunk)
+                    body["bytes"] = size
+            return True
+        except Exception as e:
+            span["error"] = str(e)[:200]
+            console.log(f"[red]Failed:[/red] {url} → {e}")
+            return False
+
+def http_trace_config(aiohttp):
+    """TraceConfig aiohttp yang mengirim span connect & TTFB ke tracer."""
+    config = aiohttp.TraceConfig()
+
+    def tid_of(ctx):
+        return (ctx.trace_request_ctx or {}).get("tid", 0)
+
+    async def on_request_start(session, ctx, params):
+        ctx.request_start = time.perf_counter_ns()
+
+    async def on_connection_create_start(session, ctx, params):
+        ctx.connect_start = time.perf_counter_ns()
+
+    async def on_connection_create_end(session, ctx, params):
+        tracer.add("http.connect", "http", ctx.connect_start, time.perf_counter_ns(), tid_of(ctx))
+
+    async def on_request_end(session, ctx, params):
+        # dipanggil setelah header response diterima
+        tracer.add("http.ttfb", "http", ctx.request_start, time.perf_counter_ns(), tid_of(ctx), status=params.response.status)
+
+    config.on_request_start.append(on_request_start)
+    config.on_connection_create_start.append(on_connection_create_start)
+    config.on_connection_create_end.append(on_connection_create_end)
+    config.on_request_end.append(on_request_end)
+    return config
+
+def _pump_urls(it, loop, lines: asyncio.Queue, slots: threading.Semaphore, stop: threading.Event):
+    """Jalan di daemon thread: baca iterable (stdin/gzip bisa blocking) & serahkan URL satu per satu ke event loop.
+
+    Backpressure lewat `slots` (bukan menunggu event loop), jadi thread tidak pernah menggantung kalau
+    konsumen berhenti: `stop` dicek tiap 0.2s. Error baca (gzip rusak, encoding) dikirim lewat `lines`
+    supaya dilempar ulang di event loop; akhir stream ditandai None.
+    """
+    end = None
     try:
-        async with session.get(url, timeout=120) as resp:
-            resp.raise_for_status()
-            with dest.open("wb") as f:
-                async for chunk in resp.content.iter_chunked(256 * 1024):
-                    if chunk:
-                        f.write(chunk)
-        return True
+        for url in it:
+            while not slots.acquire(timeout=0.2):
+                if stop.is_set():
+                    return
+            if stop.is_set():
+                return
+            loop.call_soon_threadsafe(lines.put_nowait, url)
     except Exception as e:
-        console.log(f"[red]Failed:[/red] {url} → {e}")
-        return False
+        end = e
+    finally:
+        try:
+            loop.call_soon_threadsafe(lines.put_nowait, end)
+        except RuntimeError:
+            pass  # event loop sudah ditutup
+
+async def download_many(
+    urls,
+    workers: int = 4,
+    queue_size: int = 256,
+    chunk_size: int = 256 * 1024,
+    write_buffer: int = 1024 * 1024,
+):
+    """Unduh dari iterable URL; URL langsung masuk ke worker selagi dibaca."""
+    import aiohttp
+    from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
 
-async def download_many(urls: list):
-    urls = [u for u in urls if ".mp4" in u.lower()]
-    if not urls:
-        console.print("[yellow]Tidak ada URL video (.mp4) yang valid untuk diunduh.[/yellow]")
-        return
     OUTPUT_DIR.mkdir(exist_ok=True)
-    async with aiohttp.ClientSession() as session:
+    it = iter(urls)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    trace_configs = [http_trace_config(aiohttp)] if tracer.enabled else []
+    async with aiohttp.ClientSession(trace_configs=trace_configs) as session:
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -170,15 +578,60 @@ async def download_many(urls: list):
             TimeElapsedColumn(),
             console=console,
         ) as progress:
-            task = progress.add_task("[cyan]Downloading videos...", total=len(urls))
+            task = progress.add_task("[cyan]Downloading videos...", total=0)
+
+            async def worker(tid: int):
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    url, dest = item
+                    ok = await download_one(
+                        session, url, dest, chunk_size=chunk_size, write_buffer=write_buffer, tid=tid
+                    )
+                    if ok:
+                        progress.update(task, advance=1)
+
+            tasks = [asyncio.create_task(worker(i + 1)) for i in range(max(1, workers))]
             idx = 0
-            for url in urls:
-                idx += 1
-                filename = f"video_{idx}.mp4"
-                dest = OUTPUT_DIR / filename
-                ok = await download_one(session, url, dest)
-                if ok:
-                    progress.update(task, advance=1)
+            # Reader daemon thread supaya stdin/gzip tidak memblok event loop; tiap URL langsung diteruskan.
+            # Daemon (bukan to_thread) supaya Ctrl-C tidak menunggu thread yang masih blocking di stdin.
+            lines: asyncio.Queue = asyncio.Queue()
+            slots = threading.Semaphore(queue_size)
+            stop = threading.Event()
+            threading.Thread(
+                target=_pump_urls, args=(it, asyncio.get_running_loop(), lines, slots, stop), daemon=True
+            ).start()
+            cancelled = False
+            try:
+                while True:
+                    url = await lines.get()
+                    if url is None:
+                        break
+                    if isinstance(url, Exception):
+                        raise url
+                    slots.release()
+                    if ".mp4" not in url.lower():
+                        continue
+                    idx += 1
+                    progress.update(task, total=idx)
+                    await queue.put((url, OUTPUT_DIR / f"video_{idx}.mp4"))
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            finally:
+                stop.set()
+                if cancelled:
+                    for t in tasks:
+                        t.cancel()
+                else:
+                    # Reader error juga lewat sini: download yang sudah antre tetap selesai
+                    for _ in tasks:
+                        await queue.put(None)
+                await asyncio.gather(*tasks, return_exceptions=cancelled)
+
+    if idx == 0:
+        console.print("[yellow]Tidak ada URL video (.mp4) yang valid untuk diunduh.[/yellow]")
 
 def validate_url(url: str) -> str:
     if not url:
@@ -190,24 +643,25 @@ def validate_url(url: str) -> str:
 
 @app.command()
 def download(
-    input_file: Path = typer.Argument(None, help="File URL list"),
+    input_file: Path = typer.Argument(None, help="File URL list ('-' = stdin, .gz didukung)"),
     input_file_opt: Path = typer.Option(None, "--input-file", help="File URL list (option)"),
+    workers: int = typer.Option(4, "--workers", help="Jumlah download paralel"),
+    dedupe_capacity: int = typer.Option(1_000_000, "--dedupe-capacity", help="Kapasitas Bloom filter dedupe"),
+    chunk_kb: int = typer.Option(256, "--chunk-kb", help="Ukuran chunk baca jaringan (KB)"),
+    write_buffer_kb: int = typer.Option(1024, "--write-buffer-kb", help="Ukuran buffer tulis disk (KB)"),
 ):
     file_path = input_file_opt or input_file
-    if not file_path or not file_path.exists():
+    if not file_path or (str(file_path) != "-" and not file_path.exists()):
         console.print("[red]Error:[/red] File input tidak ditemukan.")
         raise typer.Exit(code=1)
 
-    urls = [
-        u.strip()
-        for u in file_path.read_text(encoding="utf-8").splitlines()
-        if u.strip()
-    ]
-    if not urls:
-        console.print("[yellow]Tidak ada URL di file input.[/yellow]")
-        raise typer.Exit(code=0)
-
-    asyncio.run(download_many(urls))
+    urls = dedupe_stream(iter_url_lines(file_path), capacity=dedupe_capacity)
+    asyncio.run(download_many(
+        urls,
+        workers=workers,
+        chunk_size=chunk_kb * 1024,
+        write_buffer=write_buffer_kb * 1024,
+    ))
 
 
 @app.command()
@@ -218,6 +672,12 @@ def grab(
     debug: bool = typer.Option(False, "--debug", help="Save HTML"),
     scroll_max: int = typer.Option(12, "--scroll-max", help="Max scroll rounds"),
     wait_ms: int = typer.Option(2000, "--wait-ms", help="Delay per scroll (ms)"),
+    long_scroll: bool = typer.Option(False, "--long-scroll", help="Scroll tanpa batas dengan memori browser terjaga"),
+    heap_limit_mb: int = typer.Option(512, "--heap-limit-mb", help="Batas JS heap sebelum page di-reload (MB)"),
+    workers: int = typer.Option(4, "--workers", help="Jumlah download paralel"),
+    chunk_kb: int = typer.Option(256, "--chunk-kb", help="Ukuran chunk baca jaringan (KB)"),
+    write_buffer_kb: int = typer.Option(1024, "--write-buffer-kb", help="Ukuran buffer tulis disk (KB)"),
+    playwright_trace: Path = typer.Option(None, "--trace-playwright", help="Simpan Playwright trace (.zip) dari proses scrape"),
 ):
     url = validate_url(target_url_opt or target_url)
     if not url:
@@ -225,14 +685,28 @@ def grab(
         raise typer.Exit(code=1)
 
     urls = asyncio.run(
-        scrape_with_playwright(url, headful=headful, scroll_max=scroll_max, wait_ms=wait_ms, debug=debug)
+        scrape_with_playwright(
+            url,
+            headful=headful,
+            scroll_max=scroll_max,
+            wait_ms=wait_ms,
+            debug=debug,
+            long_scroll=long_scroll,
+            heap_limit_mb=heap_limit_mb,
+            playwright_trace=playwright_trace,
+        )
     )
     if not urls:
         console.print(f"[yellow]Tidak ditemukan video di {url}[/yellow]")
         raise typer.Exit(code=0)
 
     console.log(f"[yellow]Found {len(urls)} videos. Starting download...[/yellow]")
-    asyncio.run(download_many(urls))
+    asyncio.run(download_many(
+        urls,
+        workers=workers,
+        chunk_size=chunk_kb * 1024,
+        write_buffer=write_buffer_kb * 1024,
+    ))
 
 
 if __name__ == "__main__":
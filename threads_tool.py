@@ -6,19 +6,579 @@ Enhanced version specifically designed for Threads.com
 
 import os
 import re
-import requests
+import sys
+import argparse
+import gzip
+import math
+import hashlib
 import time
 import json
+import xml.etree.ElementTree as ET
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
-from urllib.parse import urlparse, parse_qs
-from playwright.sync_api import sync_playwright
-from typing import List, Dict, Optional
+from urllib.parse import urlparse, parse_qs, urlencode, urljoin
+from typing import List, Dict, Optional, Iterator, Tuple
+
+# requests and playwright are imported where they are used to keep startup fast
+
+class BloomFilter:
+    """Scalable Bloom filter used to deduplicate very large URL lists.
+
+    Starts sized for ``capacity`` items and adds a layer with twice the
+    capacity (and half the error rate) each time the current one fills up,
+    so the overall false-positive rate stays below ``error_rate`` however
+    many URLs are fed in. Never returns a false negative.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 1e-6):
+        self.layers: List[Dict] = []
+        self.duplicates = 0
+        self._add_layer(max(1, capacity), error_rate / 2)
+
+    def _add_layer(self, capacity: int, error_rate: float):
+        num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.layers.append({
+            'capacity': capacity,
+            'error_rate': error_rate,
+            'count': 0,
+            'num_bits': num_bits,
+            'num_hashes': max(1, round(num_bits / capacity * math.log(2))),
+            'bits': bytearray((num_bits + 7) // 8)
+        })
+
+    @staticmethod
+    def _hashes(item: str) -> Tuple[int, int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    @staticmethod
+    def _positions(layer: Dict, h1: int, h2: int):
+        # Enhanced double hashing: plain h1 + i*h2 collapses to a few bits when h2 shares a
+        # large factor with num_bits
+        num_bits = layer['num_bits']
+        for i in range(layer['num_hashes']):
+            yield h1 % num_bits
+            h1 += h2
+            h2 += i
+
+    def _in_layer(self, layer: Dict, h1: int, h2: int) -> bool:
+        bits = layer['bits']
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(layer, h1, h2))
+
+    def add(self, item: str) -> bool:
+        """Add item, returning True (and counting a duplicate) if it was probably present"""
+        h1, h2 = self._hashes(item)
+        if any(self._in_layer(layer, h1, h2) for layer in self.layers):
+            self.duplicates += 1
+            return True
+        
+        layer = self.layers[-1]
+        if layer['count'] >= layer['capacity']:
+            self._add_layer(layer['capacity'] * 2, layer['error_rate'] / 2)
+            layer = self.layers[-1]
+        for pos in self._positions(layer, h1, h2):
+            layer['bits'][pos >> 3] |= 1 << (pos & 7)
+        layer['count'] += 1
+        return False
+
+    def __contains__(self, item: str) -> bool:
+        h1, h2 = self._hashes(item)
+        return any(self._in_layer(layer, h1, h2) for layer in self.layers)
+
+def iter_url_lines(source: str, seen: Optional[BloomFilter] = None) -> Iterator[str]:
+    """Lazily yield unique URLs from a file, a .gz file or stdin ('-')"""
+    seen = seen if seen is not None else BloomFilter()
+    if source == "-":
+        fh = sys.stdin
+    elif source.endswith(".gz"):
+        fh = gzip.open(source, "rt", encoding="utf-8")
+    else:
+        fh = open(source, "r", encoding="utf-8")
+    try:
+        for line in fh:
+            url = line.strip()
+            if url and not seen.add(url):
+                yield url
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Referer': 'https://www.threads.net/',
+    'Accept': '*/*'
+}
+
+# A segment is (url, byte_range) where byte_range is "start-end" or None for the whole resource
+Segment = Tuple[str, Optional[str]]
+
+def _local_tag(element) -> str:
+    return element.tag.rsplit('}', 1)[-1]
+
+def _child(element, name: str):
+    for child in element:
+        if _local_tag(child) == name:
+            return child
+    return None
+
+def _children(element, name: str) -> list:
+    return [child for child in element if _local_tag(child) == name]
+
+def _parse_iso_duration(value: str) -> float:
+    match = re.match(r'P(?:(\d+(?:\.\d+)?)D)?T?(?:(\d+(?:\.\d+)?)H)?(?:(\d+(?:\.\d+)?)M)?(?:(\d+(?:\.\d+)?)S)?', value or '')
+    if not match:
+        return 0.0
+    days, hours, minutes, seconds = (float(g) if g else 0.0 for g in match.groups())
+    return days * 86400 + hours * 3600 + minutes * 60 + seconds
+
+def _fill_template(template: str, rep_id: str, bandwidth: str, number: int = 0, time_: int = 0) -> str:
+    values = {'RepresentationID': rep_id, 'Bandwidth': bandwidth, 'Number': number, 'Time': time_}
+
+    def replace(match):
+        name, width = match.group(1), match.group(3)
+        value = values[name]
+        return f"{int(value):0{width}d}" if width else str(value)
+
+    filled = re.sub(r'\$(RepresentationID|Number|Bandwidth|Time)(%0(\d+)d)?\$', replace, template)
+    return filled.replace('$$', '$')
+
+def parse_dash_manifest(manifest: str, manifest_url: str = '') -> List[Dict]:
+    """Parse a DASH MPD into representations sorted by bandwidth (highest first)"""
+    root = ET.fromstring(manifest)
+    total_seconds = _parse_iso_duration(root.get('mediaPresentationDuration', ''))
+    base = manifest_url
+    if _child(root, 'BaseURL') is not None:
+        base = urljoin(base, _child(root, 'BaseURL').text.strip())
+    
+    representations = []
+    for period in _children(root, 'Period'):
+        # Period length: its own duration, else the rest of the presentation
+        period_seconds = _parse_iso_duration(period.get('duration', '')) or max(total_seconds - _parse_iso_duration(period.get('start', '')), 0.0)
+        period_base = urljoin(base, _child(period, 'BaseURL').text.strip()) if _child(period, 'BaseURL') is not None else base
+        for adaptation in _children(period, 'AdaptationSet'):
+            set_base = urljoin(period_base, _child(adaptation, 'BaseURL').text.strip()) if _child(adaptation, 'BaseURL') is not None else period_base
+            for rep in _children(adaptation, 'Representation'):
+                rep_base = urljoin(set_base, _child(rep, 'BaseURL').text.strip()) if _child(rep, 'BaseURL') is not None else set_base
+                rep_id = rep.get('id', '')
+                bandwidth = rep.get('bandwidth', '0')
+                mime = rep.get('mimeType') or adaptation.get('mimeType') or ''
+                content_type = adaptation.get('contentType') or mime.split('/')[0]
+                init: List[Segment] = []
+                media_segments: List[Segment] = []
+                
+                template = _child(rep, 'SegmentTemplate')
+                if template is None:
+                    template = _child(adaptation, 'SegmentTemplate')
+                segment_list = _child(rep, 'SegmentList')
+                
+                if template is not None:
+                    if template.get('initialization'):
+                        init.append((urljoin(rep_base, _fill_template(template.get('initialization'), rep_id, bandwidth)), None))
+                    media = template.get('media', '')
+                    number = int(template.get('startNumber', '1'))
+                    timescale = int(template.get('timescale', '1'))
+                    period_end = int(template.get('presentationTimeOffset', '0')) + period_seconds * timescale
+                    timeline = _child(template, 'SegmentTimeline')
+                    if timeline is not None:
+                        current = 0
+                        entries = _children(timeline, 'S')
+                        for position, entry in enumerate(entries):
+                            current = int(entry.get('t', current))
+                            duration = int(entry.get('d', '0'))
+                            repeat = int(entry.get('r', '0'))
+                            if repeat < 0:
+                                # r="-1" repeats until the next S@t, or the end of the period
+                                following = entries[position + 1].get('t') if position + 1 < len(entries) else None
+                                end = int(following) if following is not None else period_end
+                                repeat = math.ceil((end - current) / duration) - 1 if duration else -1
+                            for _ in range(repeat + 1):
+                                media_segments.append((urljoin(rep_base, _fill_template(media, rep_id, bandwidth, number, current)), None))
+                                number += 1
+                                current += duration
+                    elif template.get('duration') and period_seconds:
+                        count = math.ceil(period_seconds * timescale / int(template.get('duration')))
+                        for offset in range(count):
+                            media_segments.append((urljoin(rep_base, _fill_template(media, rep_id, bandwidth, number + offset)), None))
+                elif segment_list is not None:
+                    init_element = _child(segment_list, 'Initialization')
+                    if init_element is not None:
+                        init.append((urljoin(rep_base, init_element.get('sourceURL', '')), init_element.get('range')))
+                    for segment_url in _children(segment_list, 'SegmentURL'):
+                        media_segments.append((urljoin(rep_base, segment_url.get('media', '')), segment_url.get('mediaRange')))
+                else:
+                    # SegmentBase: BaseURL is itself a complete fragmented MP4
+                    media_segments.append((rep_base, None))
+                
+                # An init segment alone is not a playable file
+                if not media_segments:
+                    continue
+                segments = init + media_segments
+                representations.append({
+                    'id': rep_id,
+                    'content_type': content_type,
+                    'mime': mime,
+                    'bandwidth': int(bandwidth),
+                    'segments': segments
+                })
+    
+    representations.sort(key=lambda r: r['bandwidth'], reverse=True)
+    return representations
+
+def dash_manifests_for_post(page_source: str, post_code: str) -> List[str]:
+    """Embedded ``video_dash_manifest`` strings that belong to one post.
+
+    Post pages also embed replies and suggested posts, so each manifest is
+    attributed to the nearest ``"code"`` key of the page JSON; an empty
+    post_code keeps every manifest.
+    """
+    codes = [(m.start(), m.group(1)) for m in re.finditer(r'"code"\s*:\s*"([^"]+)"', page_source)]
+    manifests = []
+    for match in re.finditer(r'"video_dash_manifest"\s*:\s*"((?:[^"\\]|\\.)*)"', page_source):
+        if post_code:
+            if not codes:
+                continue
+            _, nearest = min(codes, key=lambda c: match.start() - c[0] if c[0] < match.start() else c[0] - match.end())
+            if nearest != post_code:
+                continue
+        manifests.append(json.loads(f'"{match.group(1)}"'))
+    return manifests
+
+def segments_from_captured_requests(captured: List[Tuple[str, str]], media: str = 'video') -> List[Segment]:
+    """Derive whole-resource segments from byte-range requests the player made.
+
+    MSE players fetch the same fMP4 file piecewise using ``bytestart``/``byteend``
+    query parameters; the largest resource of the given media type (``video``
+    or ``audio``) is returned without those parameters so it can be fetched in full.
+    """
+    groups: Dict[str, int] = {}
+    for url, content_type in captured:
+        content_type = content_type.lower()
+        if ('audio' in content_type) != (media == 'audio'):
+            continue
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        if 'bytestart' not in query and media not in content_type:
+            continue
+        stripped = {k: v for k, v in query.items() if k not in ('bytestart', 'byteend')}
+        base = parsed._replace(query=urlencode(stripped, doseq=True)).geturl()
+        seen = int(query.get('byteend', ['0'])[0] or 0)
+        groups[base] = max(groups.get(base, 0), seen)
+    if not groups:
+        return []
+    best = max(groups, key=groups.get)
+    return [(best, None)]
+
+class RangeNotSupported(Exception):
+    """A ranged request did not come back as the requested 206 partial content"""
+
+class SegmentDownloader:
+    """Fetch fMP4/DASH segments in parallel over pooled connections and concatenate them"""
+    
+    def __init__(self, workers: int = 8, part_size: int = 4 * 1024 * 1024, headers: Optional[Dict] = None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        self.workers = max(1, workers)
+        self.part_size = part_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+    
+    def close(self):
+        self.session.close()
+    
+    def _split(self, segment: Segment) -> List[Segment]:
+        """Split a whole-resource segment into byte ranges when the server supports it"""
+        import requests
+        
+        url, byte_range = segment
+        if byte_range:
+            return [segment]
+        try:
+            head = self.session.head(url, allow_redirects=True, timeout=30)
+            length = int(head.headers.get('content-length', 0))
+            ranged = head.headers.get('accept-ranges', '').lower() == 'bytes'
+        except (requests.RequestException, ValueError):
+            return [segment]
+        if not ranged or length <= self.part_size:
+            return [segment]
+        return [(url, f"{start}-{min(start + self.part_size, length) - 1}") for start in range(0, length, self.part_size)]
+    
+    @staticmethod
+    def _parse_range(byte_range: str) -> Tuple[int, Optional[int]]:
+        start, _, end = byte_range.partition('-')
+        return int(start), int(end) if end else None
+    
+    def _fetch(self, segment: Segment) -> bytes:
+        url, byte_range = segment
+        headers = {'Range': f'bytes={byte_range}'} if byte_range else None
+        response = self.session.get(url, headers=headers, timeout=60)
+        response.raise_for_status()
+        if not byte_range:
+            return response.content
+        
+        # A server that ignores Range answers 200 with the whole resource
+        if response.status_code != 206:
+            raise RangeNotSupported(f"{url} answered {response.status_code} to Range: bytes={byte_range}")
+        start, end = self._parse_range(byte_range)
+        match = re.match(r'bytes (\d+)-(\d+)/', response.headers.get('content-range', ''))
+        if not match or int(match.group(1)) != start or (end is not None and int(match.group(2)) != end):
+            raise RangeNotSupported(f"{url} returned Content-Range {response.headers.get('content-range')!r} for bytes={byte_range}")
+        return response.content
+    
+    def _fetch_sliced(self, segments: List[Segment], pool) -> Iterator[bytes]:
+        """Fallback for servers without Range support: one GET per resource, sliced locally"""
+        urls = list(dict.fromkeys(url for url, _ in segments))
+        bodies = dict(zip(urls, pool.map(lambda url: self._fetch((url, None)), urls)))
+        for url, byte_range in segments:
+            if not byte_range:
+                yield bodies[url]
+                continue
+            start, end = self._parse_range(byte_range)
+            yield bodies[url][start:None if end is None else end + 1]
+    
+    def download(self, segments: List[Segment], dest: str) -> int:
+        """Download segments in order into dest, keeping at most 2x workers parts in memory"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # Only a single whole-resource segment is worth probing (HEAD) for parallel ranges;
+        # multi-segment manifests are already parallel per segment
+        parts: List[Segment] = self._split(segments[0]) if len(segments) == 1 else list(segments)
+        
+        try:
+            return self._download_parts(parts, dest)
+        except RangeNotSupported:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool, open(dest, 'wb') as f:
+                written = 0
+                for data in self._fetch_sliced(segments, pool):
+                    f.write(data)
+                    written += len(data)
+            return written
+    
+    def _download_parts(self, parts: List[Segment], dest: str) -> int:
+        from concurrent.futures import ThreadPoolExecutor
+        
+        written = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool, open(dest, 'wb') as f:
+            pending = deque()
+            parts_iter = iter(parts)
+            for part in parts_iter:
+                pending.append(pool.submit(self._fetch, part))
+                if len(pending) >= self.workers * 2:
+                    break
+            while pending:
+                data = pending.popleft().result()
+                f.write(data)
+                written += len(data)
+                part = next(parts_iter, None)
+                if part is not None:
+                    pending.append(pool.submit(self._fetch, part))
+        return written
+
+# Finds one card per post (the nearest article / list item / pressable container,
+# else the largest ancestor holding links to that post only) and scores its video
+# markers. Post IDs under each ancestor are collected in one pass over links x
+# depth, so the cost stays linear in the live DOM. Every live card is re-scored
+# each call, since markers mount late on cards that just scrolled in; callers keep
+# the max. mode: 'score' only scores; 'detach' swaps cards scrolled above the
+# viewport for an empty placeholder of the same height, keeping the feed DOM
+# bounded however far the scroll goes; 'media' (fallback when the page errors on
+# detached nodes) only unloads their media and leaves the React-owned nodes alone.
+FEED_CARDS_JS = """
+    (mode) => {
+        const postId = href => {
+            const m = href.match(/\\/post\\/([^\\/?#]+)/);
+            return m ? m[1] : null;
+        };
+        const durationRe = /^\\d{1,2}:\\d{2}(:\\d{2})?$/;
+        const CARD_BOUNDARY = 'article, li, [role="article"], [role="listitem"], [data-pressable-container]';
+        
+        const idsUnder = new Map();
+        const firstLink = new Map();
+        document.querySelectorAll('a[href*="/post/"]').forEach(a => {
+            const id = postId(a.href);
+            if (!id) return;
+            if (!firstLink.has(id)) firstLink.set(id, a);
+            for (let el = a.parentElement; el && el !== document.body; el = el.parentElement) {
+                let ids = idsUnder.get(el);
+                if (!ids) idsUnder.set(el, ids = new Set());
+                ids.add(id);
+            }
+        });
+        
+        const posts = [];
+        let removed = 0;
+        firstLink.forEach((a, id) => {
+            // Nearest post boundary; a quote post or self-reply puts a second post ID
+            // inside the card, so the single-ID climb is only the fallback
+            let card = a.closest(CARD_BOUNDARY);
+            if (!card || card === document.body) {
+                card = a;
+                while (card.parentElement && card.parentElement !== document.body && idsUnder.get(card.parentElement).size <= 1) {
+                    card = card.parentElement;
+                }
+            }
+            if (card.hasAttribute('data-sedot-pruned')) return;
+            
+            let score = 0;
+            if (card.querySelector('video')) score += 3;
+            if ([...card.querySelectorAll('span, div')].some(el => el.children.length === 0 && durationRe.test(el.textContent.trim()))) score += 2;
+            if (card.querySelector('[aria-label*="video" i], [aria-label*="play" i]')) score += 2;
+            if (card.querySelector('video[poster], img[src*=".mp4"], img[src*="video"]')) score += 1;
+            posts.push({id: id, href: a.href, score: score});
+            
+            if (mode === 'score' || card.getBoundingClientRect().bottom >= 0) return;
+            card.querySelectorAll('video').forEach(v => { v.pause(); v.removeAttribute('src'); v.load(); });
+            if (mode === 'detach') {
+                const placeholder = document.createElement('div');
+                placeholder.style.height = card.getBoundingClientRect().height + 'px';
+                placeholder.setAttribute('data-sedot-pruned', id);
+                card.replaceWith(placeholder);
+            } else {
+                card.querySelectorAll('img').forEach(img => { img.removeAttribute('srcset'); img.removeAttribute('src'); });
+                card.setAttribute('data-sedot-pruned', id);
+            }
+            removed++;
+        });
+        return {
+            posts: posts,
+            removed: removed,
+            heap: performance.memory ? performance.memory.usedJSHeapSize : 0
+        };
+    }
+"""
+
+class Tracer:
+    """Records nested spans as Chrome trace-event JSON (chrome://tracing, Perfetto).
+
+    Disabled tracers hand out no-op spans, so instrumentation stays in place.
+    """
+    
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.events: List[Dict] = []
+        self.pid = os.getpid()
+    
+    def add(self, name: str, cat: str, start_ns: int, end_ns: int, tid: int = 0, **args):
+        if self.enabled:
+            self.events.append({
+                'name': name, 'cat': cat, 'ph': 'X',
+                'ts': start_ns / 1000, 'dur': (end_ns - start_ns) / 1000,
+                'pid': self.pid, 'tid': tid, 'args': args
+            })
+    
+    @contextmanager
+    def span(self, name: str, cat: str = 'post', tid: int = 0, **args):
+        if not self.enabled:
+            yield args
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield args  # callers may add result details to args
+        finally:
+            self.add(name, cat, start, time.perf_counter_ns(), tid, **args)
+    
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+class StrategyStats:
+    """Persistent hit-rate and latency statistics for extraction strategies.
+
+    Keys are free-form (``strategy:dom``, ``selector:video[src]``...). Ranking
+    favours the highest hit rate per second, using a prior latency for keys
+    that have no history yet so fresh installs keep the default order.
+    Rates and latencies are exponentially weighted (``decay`` per attempt),
+    so a Threads markup change shows up within a few dozen posts instead of
+    being buried under lifetime totals.
+    """
+    
+    def __init__(self, path: str, decay: float = 0.1):
+        self.path = path
+        self.decay = decay
+        self.data: Dict[str, Dict[str, float]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError):
+                self.data = {}
+        for entry in self.data.values():
+            # Files written before the weighted averages existed: seed them from the totals
+            entry.setdefault('rate', (entry['hits'] + 1) / (entry['attempts'] + 2))
+            entry.setdefault('latency', entry['seconds'] / entry['attempts'] if entry['attempts'] else 0.0)
+    
+    def record(self, key: str, hit: bool, elapsed: float):
+        entry = self.data.setdefault(key, {'attempts': 0, 'hits': 0, 'seconds': 0.0, 'rate': 0.5, 'latency': elapsed})
+        entry['attempts'] += 1
+        entry['hits'] += int(hit)
+        entry['seconds'] += elapsed
+        entry['rate'] += self.decay * (int(hit) - entry['rate'])
+        entry['latency'] += self.decay * (elapsed - entry['latency'])
+    
+    def hit_rate(self, key: str) -> float:
+        return self.data.get(key, {}).get('rate', 0.5)
+    
+    def latency(self, key: str, prior: float) -> float:
+        entry = self.data.get(key, {})
+        if not entry.get('attempts'):
+            return prior
+        return max(entry['latency'], 0.001)
+    
+    def rank(self, keys: List[str], priors: List[float]) -> List[str]:
+        """Order keys by expected hits per second, best first"""
+        prior_for = dict(zip(keys, priors))
+        return sorted(keys, key=lambda k: self.hit_rate(k) / self.latency(k, prior_for[k]), reverse=True)
+    
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=2)
+        except OSError:
+            pass
+    
+    def report(self) -> List[Tuple[str, int, int, float, float]]:
+        """Rows of (key, attempts, hits, recent hit rate, recent avg seconds) sorted by key"""
+        rows = []
+        for key in sorted(self.data):
+            entry = self.data[key]
+            rows.append((key, int(entry['attempts']), int(entry['hits']), entry['rate'], entry['latency']))
+        return rows
 
 class ThreadsDownloader:
     def __init__(self):
         self.output_dir = "downloads"
         self.urls_file = "scraped_urls.txt"
-        self.input_file = "input.txt"
+        self.input_file = "input.txt"  # "-" reads stdin, "*.gz" is decompressed on the fly
+        self.dedupe_capacity = 1_000_000
+        self.segment_workers = 8
+        
+        # Feed prefilter: only posts whose card shows video markers are resolved
+        self.prefilter_videos = True
+        self.prefilter_min_score = 1
+        self.max_posts = 20  # posts resolved per profile scrape, 0 = no limit
+        
+        # Long-scroll mode: scroll until the feed ends, swapping harvested post
+        # cards for placeholders and reloading the page when the JS heap grows past the limit
+        self.long_scroll = False
+        self.heap_limit_mb = 512
+        self.scroll_stall_rounds = 3
+        self.max_page_reloads = 5
+        
+        # Extraction: strategies are reordered by past hit rate / latency, bounded per post
+        self.post_deadline = 30.0  # seconds
+        self.stats = StrategyStats("strategy_stats.json")
+        
+        # Tracing (opt-in): span timeline per post, Playwright traces of the slowest posts
+        self.tracer = Tracer()
+        self.trace_file = "threads_trace.json"
+        self.trace_slowest = 0
+        self.trace_dir = "traces"
+        self.playwright_traces: List[Tuple[float, str]] = []
+        self.trace_seq = 0
         self.log_file = f"threads_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         
         # Create directories
@@ -41,6 +601,8 @@ class ThreadsDownloader:
         """Initialize browser session with Threads-optimized settings"""
         if not self.browser:
             self.log("Initializing browser for Threads...")
+            from playwright.sync_api import sync_playwright
+            
             self.playwright = sync_playwright().start()
             self.browser = self.playwright.chromium.launch(
                 headless=False,  # Set to True for headless mode
@@ -54,12 +616,14 @@ class ThreadsDownloader:
                 ]
             )
             
-            context = self.browser.new_context(
+            self.context = self.browser.new_context(
                 viewport={'width': 1920, 'height': 1080},
                 user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
             )
+            if self.trace_slowest:
+                self.context.tracing.start(screenshots=True, snapshots=True)
             
-            self.page = context.new_page()
+            self.page = self.context.new_page()
             
             # Set additional headers
             self.page.set_extra_http_headers({
@@ -74,158 +638,280 @@ class ThreadsDownloader:
     def close_browser(self):
         """Close browser session"""
         if self.browser:
+            if self.trace_slowest:
+                self.context.tracing.stop()
             self.browser.close()
             self.playwright.stop()
             self.browser = None
             self.page = None
     
-    def extract_video_url_from_post(self, post_url: str) -> Optional[str]:
-        """Extract video URL from Threads post using multiple strategies"""
+    @contextmanager
+    def trace_post(self, post_url: str):
+        """Trace span for one post; keeps Playwright traces of the slowest N posts"""
+        chunk = bool(self.trace_slowest and self.browser)
+        if chunk:
+            self.context.tracing.start_chunk(title=post_url)
+        started = time.monotonic()
         try:
-            self.log(f"🔍 Analyzing Threads post: {post_url}")
-            
-            # Navigate to post
-            self.page.goto(post_url, wait_until="networkidle", timeout=30000)
-            self.log("✓ Page loaded, waiting for content...")
+            with self.tracer.span('post', url=post_url):
+                yield
+        finally:
+            if chunk:
+                self._keep_slowest_trace(post_url, time.monotonic() - started)
+    
+    def _keep_slowest_trace(self, post_url: str, elapsed: float):
+        if len(self.playwright_traces) >= self.trace_slowest and elapsed <= self.playwright_traces[-1][0]:
+            self.context.tracing.stop_chunk()
+            return
+        
+        os.makedirs(self.trace_dir, exist_ok=True)
+        post_id_match = re.search(r'/post/([^/?]+)', post_url)
+        name = post_id_match.group(1) if post_id_match else str(int(time.time() * 1000))
+        # Sequence suffix: the same post can be traced more than once per run
+        self.trace_seq += 1
+        path = os.path.join(self.trace_dir, f"post_{name}_{self.trace_seq:04d}.zip")
+        self.context.tracing.stop_chunk(path=path)
+        
+        self.playwright_traces.append((elapsed, path))
+        self.playwright_traces.sort(reverse=True)
+        for _, dropped in self.playwright_traces[self.trace_slowest:]:
+            if os.path.exists(dropped):
+                os.remove(dropped)
+        del self.playwright_traces[self.trace_slowest:]
+    
+    VIDEO_SELECTORS = [
+        'video[src]',
+        'video source[src]', 
+        'video[data-src]',
+        'div[role="img"] video',
+        'article video',
+        '[data-testid*="video"] video',
+        'div[class*="video"] video',
+        'video'
+    ]
+    
+    VIDEO_PATTERNS = [
+        r'https://[^"\']*\.mp4[^"\']*',
+        r'https://[^"\']*video[^"\']*\.mp4',
+        r'blob:https://[^"\']*',
+        r'"video_url":"([^"]*)"',
+        r'"src":"([^"]*\.mp4[^"]*)"'
+    ]
+    
+    # Prior latency (seconds) per strategy, used until real statistics exist
+    STRATEGY_PRIORS = {'dom': 0.5, 'source': 1.0, 'js': 1.5, 'network': 10.0}
+    
+    def _remaining(self, deadline: float) -> float:
+        return deadline - time.monotonic()
+    
+    def _record_attempt(self, key: str, cat: str, hit: bool, started_ns: int):
+        """Feed one strategy/selector/pattern attempt to the stats and the tracer"""
+        ended_ns = time.perf_counter_ns()
+        self.stats.record(key, hit, (ended_ns - started_ns) / 1e9)
+        self.tracer.add(key, cat, started_ns, ended_ns, hit=hit)
+    
+    def _strategy_dom(self, deadline: float) -> Optional[str]:
+        """Strategy 1: Look for video elements with multiple approaches"""
+        selectors = self.stats.rank(
+            [f"selector:{s}" for s in self.VIDEO_SELECTORS],
+            [0.1 * (i + 1) for i in range(len(self.VIDEO_SELECTORS))]
+        )
+        for key in selectors:
+            if self._remaining(deadline) <= 0:
+                return None
+            selector = key.split(':', 1)[1]
+            started = time.perf_counter_ns()
+            found = None
+            try:
+                self.log(f"🔎 Trying selector: {selector}")
+                
+                # Check if elements exist
+                elements = self.page.locator(selector).all()
+                self.log(f"Found {len(elements)} elements with selector: {selector}")
+                
+                for element in elements:
+                    # Try multiple attributes
+                    for attr in ['src', 'data-src', 'data-video-src', 'data-original']:
+                        try:
+                            video_src = element.get_attribute(attr)
+                            if video_src and (video_src.startswith('http') or video_src.startswith('blob:')):
+                                self.log(f"✅ Found video URL via {selector}[{attr}]: {video_src[:100]}...")
+                                found = video_src
+                                break
+                        except:
+                            continue
+                    if found:
+                        break
+                        
+            except Exception as e:
+                self.log(f"Selector {selector} failed: {str(e)[:100]}", "DEBUG")
             
-            # Wait longer for Threads content to load
-            self.page.wait_for_timeout(8000)
-            
-            # Strategy 1: Look for video elements with multiple approaches
-            video_selectors = [
-                'video[src]',
-                'video source[src]', 
-                'video[data-src]',
-                'div[role="img"] video',
-                'article video',
-                '[data-testid*="video"] video',
-                'div[class*="video"] video',
-                'video'
-            ]
+            self._record_attempt(key, 'selector', found is not None, started)
+            if found:
+                return found
+        return None
+    
+    def _strategy_source(self, deadline: float) -> Optional[str]:
+        """Strategy 2: Check page source for video URLs"""
+        self.log("🔎 Searching page source for video URLs...")
+        content = self.page.content()
+        
+        patterns = self.stats.rank(
+            [f"pattern:{p}" for p in self.VIDEO_PATTERNS],
+            [0.01 * (i + 1) for i in range(len(self.VIDEO_PATTERNS))]
+        )
+        for key in patterns:
+            if self._remaining(deadline) <= 0:
+                return None
+            started = time.perf_counter_ns()
+            found = None
+            for match in re.findall(key.split(':', 1)[1], content, re.IGNORECASE):
+                # Clean up the URL
+                if isinstance(match, tuple):
+                    match = match[0]
+                match = match.replace('\\/', '/')
+                
+                if match.startswith(('http', 'blob:')):
+                    self.log(f"✅ Found video URL in page source: {match[:100]}...")
+                    found = match
+                    break
             
-            for selector in video_selectors:
-                try:
-                    self.log(f"🔎 Trying selector: {selector}")
-                    
-                    # Check if elements exist
-                    elements = self.page.locator(selector).all()
-                    self.log(f"Found {len(elements)} elements with selector: {selector}")
+            self._record_attempt(key, 'pattern', found is not None, started)
+            if found:
+                return found
+        return None
+    
+    def _strategy_js(self, deadline: float) -> Optional[str]:
+        """Strategy 3: Execute JavaScript to find video elements"""
+        self.log("🔎 Using JavaScript to find video elements...")
+        try:
+            video_info = self.page.evaluate("""
+                () => {
+                    const videos = document.querySelectorAll('video');
+                    const results = [];
                     
-                    for i, element in enumerate(elements):
-                        # Try multiple attributes
-                        for attr in ['src', 'data-src', 'data-video-src', 'data-original']:
-                            try:
-                                video_src = element.get_attribute(attr)
-                                if video_src and (video_src.startswith('http') or video_src.startswith('blob:')):
-                                    self.log(f"✅ Found video URL via {selector}[{attr}]: {video_src[:100]}...")
-                                    return video_src
-                            except:
-                                continue
-                                
-                except Exception as e:
-                    self.log(f"Selector {selector} failed: {str(e)[:100]}", "DEBUG")
-                    continue
-            
-            # Strategy 2: Check page source for video URLs
-            self.log("🔎 Searching page source for video URLs...")
-            content = self.page.content()
-            
-            # Look for video URL patterns in page source
-            video_patterns = [
-                r'https://[^"\']*\.mp4[^"\']*',
-                r'https://[^"\']*video[^"\']*\.mp4',
-                r'blob:https://[^"\']*',
-                r'"video_url":"([^"]*)"',
-                r'"src":"([^"]*\.mp4[^"]*)"'
-            ]
-            
-            for pattern in video_patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
-                if matches:
-                    for match in matches:
-                        # Clean up the URL
-                        if isinstance(match, tuple):
-                            match = match[0]
-                        match = match.replace('\\/', '/')
-                        
-                        if match.startswith(('http', 'blob:')):
-                            self.log(f"✅ Found video URL in page source: {match[:100]}...")
-                            return match
-            
-            # Strategy 3: Execute JavaScript to find video elements
-            self.log("🔎 Using JavaScript to find video elements...")
-            try:
-                video_info = self.page.evaluate("""
-                    () => {
-                        const videos = document.querySelectorAll('video');
-                        const results = [];
+                    videos.forEach((video, index) => {
+                        const info = {
+                            index: index,
+                            src: video.src || video.getAttribute('data-src') || '',
+                            currentSrc: video.currentSrc || '',
+                            tagName: video.tagName,
+                            attributes: {}
+                        };
                         
-                        videos.forEach((video, index) => {
-                            const info = {
-                                index: index,
-                                src: video.src || video.getAttribute('data-src') || '',
-                                currentSrc: video.currentSrc || '',
-                                tagName: video.tagName,
-                                attributes: {}
-                            };
-                            
-                            // Get all attributes
-                            for (let attr of video.attributes) {
-                                info.attributes[attr.name] = attr.value;
-                            }
-                            
-                            results.push(info);
-                        });
+                        // Get all attributes
+                        for (let attr of video.attributes) {
+                            info.attributes[attr.name] = attr.value;
+                        }
                         
-                        return results;
-                    }
-                """)
-                
-                self.log(f"JavaScript found {len(video_info)} video elements")
-                
-                for info in video_info:
-                    self.log(f"Video {info['index']}: src='{info['src']}', currentSrc='{info['currentSrc']}'")
+                        results.push(info);
+                    });
                     
-                    # Check src attributes
-                    for src_key in ['src', 'currentSrc']:
-                        src = info.get(src_key, '')
-                        if src and (src.startswith('http') or src.startswith('blob:')):
-                            self.log(f"✅ Found video URL via JavaScript: {src}")
-                            return src
-                    
-                    # Check attributes
-                    for attr_name, attr_value in info.get('attributes', {}).items():
-                        if 'src' in attr_name.lower() and attr_value:
-                            if attr_value.startswith(('http', 'blob:')):
-                                self.log(f"✅ Found video URL in attribute {attr_name}: {attr_value}")
-                                return attr_value
-                
-            except Exception as e:
-                self.log(f"JavaScript evaluation failed: {e}", "WARNING")
+                    return results;
+                }
+            """)
             
-            # Strategy 4: Network request monitoring
-            self.log("🔎 Monitoring network requests for video URLs...")
-            video_urls = []
+            self.log(f"JavaScript found {len(video_info)} video elements")
             
-            def handle_response(response):
-                url = response.url
-                content_type = response.headers.get('content-type', '')
+            for info in video_info:
+                self.log(f"Video {info['index']}: src='{info['src']}', currentSrc='{info['currentSrc']}'")
+                
+                # Check src attributes
+                for src_key in ['src', 'currentSrc']:
+                    src = info.get(src_key, '')
+                    if src and (src.startswith('http') or src.startswith('blob:')):
+                        self.log(f"✅ Found video URL via JavaScript: {src}")
+                        return src
                 
-                if (url and 
-                    (any(ext in url.lower() for ext in ['.mp4', '.webm', '.mov', 'video']) or
-                     'video' in content_type.lower())):
-                    video_urls.append(url)
-                    self.log(f"📡 Network captured video URL: {url[:100]}...")
+                # Check attributes
+                for attr_name, attr_value in info.get('attributes', {}).items():
+                    if 'src' in attr_name.lower() and attr_value:
+                        if attr_value.startswith(('http', 'blob:')):
+                            self.log(f"✅ Found video URL in attribute {attr_name}: {attr_value}")
+                            return attr_value
             
-            # Set up response listener
-            self.page.on("response", handle_response)
+        except Exception as e:
+            self.log(f"JavaScript evaluation failed: {e}", "WARNING")
+        return None
+    
+    def _strategy_network(self, deadline: float) -> Optional[str]:
+        """Strategy 4: Network request monitoring"""
+        remaining_ms = int(self._remaining(deadline) * 1000)
+        if remaining_ms < 1000:
+            self.log("⏱️ Not enough time left for network monitoring", "DEBUG")
+            return None
+        
+        self.log("🔎 Monitoring network requests for video URLs...")
+        video_urls = []
+        
+        def handle_response(response):
+            url = response.url
+            content_type = response.headers.get('content-type', '')
             
+            if (url and 
+                (any(ext in url.lower() for ext in ['.mp4', '.webm', '.mov', 'video']) or
+                 'video' in content_type.lower())):
+                video_urls.append(url)
+                self.log(f"📡 Network captured video URL: {url[:100]}...")
+        
+        # Set up response listener
+        self.page.on("response", handle_response)
+        
+        try:
             # Trigger a refresh to capture network requests
-            self.page.reload(wait_until="networkidle")
-            self.page.wait_for_timeout(5000)
+            with self.tracer.span('network_capture', cat='page'):
+                self.page.reload(wait_until="networkidle", timeout=remaining_ms)
+                self.page.wait_for_timeout(max(0, min(5000, int(self._remaining(deadline) * 1000))))
+        except Exception as e:
+            self.log(f"Network monitoring interrupted: {str(e)[:100]}", "DEBUG")
+        finally:
+            self.page.remove_listener("response", handle_response)
+        
+        return video_urls[0] if video_urls else None  # Return first found video URL
+    
+    def extract_video_url_from_post(self, post_url: str) -> Optional[str]:
+        """Extract video URL from Threads post using multiple strategies.
+
+        Strategies run cheapest-and-most-productive first according to
+        ``self.stats`` and stop once ``self.post_deadline`` seconds have passed.
+        """
+        deadline = time.monotonic() + self.post_deadline
+        try:
+            self.log(f"🔍 Analyzing Threads post: {post_url}")
             
-            if video_urls:
-                return video_urls[0]  # Return first found video URL
+            # Navigate to post
+            with self.tracer.span('goto', cat='page', url=post_url):
+                self.page.goto(post_url, wait_until="networkidle", timeout=min(30000, int(self.post_deadline * 1000)))
+            self.log("✓ Page loaded, waiting for content...")
+            
+            # Wait for a video element to show up instead of a fixed sleep
+            with self.tracer.span('wait_ready', cat='page') as span:
+                try:
+                    self.page.wait_for_selector('video', timeout=max(1, min(8000, int(self._remaining(deadline) * 1000))))
+                    span['video'] = True
+                except Exception:
+                    span['video'] = False
+            
+            strategies = {
+                'dom': self._strategy_dom,
+                'source': self._strategy_source,
+                'js': self._strategy_js,
+                'network': self._strategy_network
+            }
+            order = self.stats.rank(
+                [f"strategy:{name}" for name in strategies],
+                list(self.STRATEGY_PRIORS.values())
+            )
+            
+            for key in order:
+                if self._remaining(deadline) <= 0:
+                    self.log(f"⏱️ Post deadline of {self.post_deadline:.0f}s reached", "WARNING")
+                    break
+                started = time.perf_counter_ns()
+                video_url = strategies[key.split(':', 1)[1]](deadline)
+                self._record_attempt(key, 'strategy', video_url is not None, started)
+                if video_url:
+                    return video_url
             
             self.log("❌ No video URL found with any method", "WARNING")
             return None
@@ -233,6 +919,95 @@ class ThreadsDownloader:
         except Exception as e:
             self.log(f"❌ Error extracting video from {post_url}: {e}", "ERROR")
             return None
+        
+        finally:
+            self.stats.save()
+    
+    def strategy_report(self):
+        """Log extraction hit rates and latencies to spot Threads markup changes"""
+        rows = self.stats.report()
+        if not rows:
+            self.log("📊 No extraction statistics recorded yet")
+            return
+        self.log(f"📊 Extraction statistics ({self.stats.path}), recent hit rate and latency:")
+        for key, attempts, hits, rate, seconds in rows:
+            self.log(f"  {key[:60]:<60} {hits:>5}/{attempts:<5} {rate:6.1%} {seconds:6.2f}s")
+    
+    def capture_stream_segments(self, post_url: str) -> Dict[str, List[Segment]]:
+        """Capture DASH manifest / fMP4 segment requests behind a blob: video"""
+        import requests
+        
+        self.log("🎞️ Blob video detected, capturing stream segments...")
+        captured = []
+        manifest_urls = []
+        
+        def handle_response(response):
+            content_type = response.headers.get('content-type', '')
+            if '.mpd' in response.url.lower() or 'dash+xml' in content_type.lower():
+                manifest_urls.append(response.url)
+            elif 'video' in content_type.lower() or 'audio' in content_type.lower() or 'bytestart=' in response.url:
+                captured.append((response.url, content_type))
+        
+        self.page.on("response", handle_response)
+        try:
+            if self.page.url != post_url:
+                self.page.goto(post_url, wait_until="networkidle", timeout=30000)
+            else:
+                self.page.reload(wait_until="networkidle")
+            self.page.wait_for_timeout(5000)
+        finally:
+            self.page.remove_listener("response", handle_response)
+        
+        # Threads embeds the manifest as an escaped JSON string in the page source,
+        # next to those of replies and suggested posts; keep only the target post's
+        post_code_match = re.search(r'/post/([^/?#]+)', post_url)
+        post_code = post_code_match.group(1) if post_code_match else ''
+        manifests = [(manifest, post_url) for manifest in dash_manifests_for_post(self.page.content(), post_code)]
+        for url in manifest_urls:
+            try:
+                response = requests.get(url, headers=DEFAULT_HEADERS, timeout=30)
+                response.raise_for_status()
+                manifests.append((response.text, url))
+            except requests.RequestException as e:
+                self.log(f"Manifest fetch failed: {e}", "DEBUG")
+        
+        for manifest, manifest_url in manifests:
+            try:
+                representations = parse_dash_manifest(manifest, manifest_url)
+            except ET.ParseError as e:
+                self.log(f"Invalid DASH manifest: {e}", "DEBUG")
+                continue
+            video = [r for r in representations if r['content_type'] == 'video' and r['segments']]
+            audio = [r for r in representations if r['content_type'] == 'audio' and r['segments']]
+            if video:
+                self.log(f"✅ DASH manifest: {len(video[0]['segments'])} video segments @ {video[0]['bandwidth']}bps")
+                return {'video': video[0]['segments'], 'audio': audio[0]['segments'] if audio else []}
+        
+        segments = segments_from_captured_requests(captured)
+        audio = segments_from_captured_requests(captured, 'audio') if segments else []
+        if segments:
+            self.log(f"✅ Captured fMP4 source from network: {segments[0][0][:100]}...")
+        return {'video': segments, 'audio': audio}
+    
+    def download_stream(self, post_url: str, filepath: str) -> bool:
+        """Download a blob-backed (MSE) video by fetching its segments directly"""
+        streams = self.capture_stream_segments(post_url)
+        if not streams['video']:
+            self.log(f"❌ No stream segments captured for: {post_url}", "ERROR")
+            return False
+        
+        downloader = SegmentDownloader(workers=self.segment_workers)
+        try:
+            with self.tracer.span('segments', cat='http', count=len(streams['video'])):
+                size = downloader.download(streams['video'], filepath)
+            self.log(f"✅ Downloaded: {filepath} ({size / (1024 * 1024):.1f}MB)")
+            if streams['audio']:
+                audio_path = os.path.splitext(filepath)[0] + ".m4a"
+                downloader.download(streams['audio'], audio_path)
+                self.log(f"🔊 Audio track saved separately: {audio_path}")
+        finally:
+            downloader.close()
+        return True
     
     def debug_page_structure(self, post_url: str):
         """Comprehensive debug analysis of Threads page"""
@@ -324,6 +1099,12 @@ class ThreadsDownloader:
     
     def download_video(self, post_url: str) -> bool:
         """Download video from Threads post URL"""
+        with self.trace_post(post_url):
+            return self._download_video(post_url)
+    
+    def _download_video(self, post_url: str) -> bool:
+        import requests
+        
         try:
             # Extract post ID for filename
             post_id_match = re.search(r'/post/([^/?]+)', post_url)
@@ -342,21 +1123,22 @@ class ThreadsDownloader:
                 self.log(f"❌ No video URL found for: {post_url}", "ERROR")
                 return False
             
+            # blob: URLs only exist inside the page's MediaSource, fetch the segments instead
+            if video_url.startswith('blob:'):
+                self.log(f"⬇️ Downloading stream: {filename}")
+                return self.download_stream(post_url, filepath)
+            
             # Download video
             self.log(f"⬇️ Downloading: {filename}")
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Referer': 'https://www.threads.net/',
-                'Accept': '*/*'
-            }
-            
-            response = requests.get(video_url, stream=True, headers=headers, timeout=60)
+            # requests returns once headers arrive, so this span covers connect + TTFB
+            with self.tracer.span('http.connect_ttfb', cat='http', url=video_url[:200]):
+                response = requests.get(video_url, stream=True, headers=DEFAULT_HEADERS, timeout=60)
             response.raise_for_status()
             
             total_size = int(response.headers.get('content-length', 0))
             downloaded_size = 0
             
-            with open(filepath, 'wb') as f:
+            with self.tracer.span('http.body', cat='http') as span, open(filepath, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     if chunk:
                         f.write(chunk)
@@ -366,6 +1148,7 @@ class ThreadsDownloader:
                             progress = (downloaded_size / total_size) * 100
                             if downloaded_size % (1024 * 1024) == 0:  # Log every MB
                                 self.log(f"📥 Progress: {progress:.1f}% ({downloaded_size/1024/1024:.1f}MB)")
+                span['bytes'] = downloaded_size
             
             file_size = os.path.getsize(filepath) / (1024 * 1024)  # MB
             self.log(f"✅ Downloaded: {filepath} ({file_size:.1f}MB)")
@@ -375,6 +1158,102 @@ class ThreadsDownloader:
             self.log(f"❌ Error downloading {post_url}: {e}", "ERROR")
             return False
     
+    def score_feed_posts(self) -> Dict[str, int]:
+        """Score post cards in the feed DOM by how likely they contain a video.
+
+        Returns a mapping of post ID to confidence score (0 = no video marker).
+        """
+        return {post['id']: post['score'] for post in self.page.evaluate(FEED_CARDS_JS, 'score')['posts']}
+    
+    def long_scroll_feed(self) -> Tuple[List[str], Dict[str, int]]:
+        """Scroll the whole feed with flat browser memory.
+
+        Every round re-scores the live cards (keeping each post's best score,
+        as video markers mount after a card scrolls in) and swaps cards above
+        the viewport for placeholders. If the page throws after that, pruning
+        falls back to unloading media only and the page is reloaded. If the JS
+        heap exceeds ``self.heap_limit_mb``, the page is reloaded too; the
+        posts collected so far are the resume cursor, so scrolling back past
+        them counts as catch-up rather than a stalled feed. Stops when the
+        feed ends, after ``self.max_page_reloads`` reloads, or when a reload
+        brought no new posts.
+        """
+        post_links: Dict[str, str] = {}
+        scores: Dict[str, int] = {}
+        stalled = 0
+        rounds = 0
+        page_rounds = 0  # rounds since the page was (re)loaded
+        catchup = 0  # rounds allowed without new posts while scrolling back down after a reload
+        reloads = 0
+        new_since_reload = 0
+        mode = 'detach'
+        detached = 0
+        page_errors = []
+        on_page_error = page_errors.append
+        
+        self.page.on("pageerror", on_page_error)
+        try:
+            while stalled < self.scroll_stall_rounds:
+                rounds += 1
+                page_rounds += 1
+                self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                self.page.wait_for_timeout(2000)
+                
+                result = self.page.evaluate(FEED_CARDS_JS, mode)
+                new_posts = 0
+                for post in result['posts']:
+                    if post['id'] not in post_links:
+                        post_links[post['id']] = post['href']
+                        new_posts += 1
+                    scores[post['id']] = max(scores.get(post['id'], 0), post['score'])
+                new_since_reload += new_posts
+                if mode == 'detach':
+                    detached += result['removed']
+                
+                if new_posts:
+                    stalled = 0
+                    catchup = 0
+                elif catchup > 0:
+                    catchup -= 1
+                else:
+                    stalled += 1
+                
+                heap_mb = result['heap'] / (1024 * 1024)
+                if rounds % 10 == 0:
+                    self.log(f"Scroll {rounds}: {len(post_links)} posts, JS heap {heap_mb:.0f}MB")
+                
+                reason = None
+                if page_errors and mode == 'detach' and detached:
+                    # React may still hold the swapped-out cards; stop touching its nodes
+                    self.log(f"⚠️ Page error after detaching cards ({page_errors[0]}), falling back to media-only pruning", "WARNING")
+                    mode = 'media'
+                    reason = "page error"
+                elif heap_mb > self.heap_limit_mb:
+                    reason = f"JS heap {heap_mb:.0f}MB over {self.heap_limit_mb}MB"
+                page_errors.clear()
+                if not reason:
+                    continue
+                
+                if reloads >= self.max_page_reloads:
+                    self.log(f"⚠️ {reason} after {reloads} reloads, stopping scroll", "WARNING")
+                    break
+                if reloads and not new_since_reload:
+                    self.log(f"⚠️ {reason} and no new posts since last reload, stopping scroll", "WARNING")
+                    break
+                
+                reloads += 1
+                self.log(f"♻️ {reason}, reloading ({reloads}/{self.max_page_reloads}) and resuming after {len(post_links)} posts")
+                self.page.reload(wait_until="networkidle", timeout=30000)
+                self.page.wait_for_timeout(5000)
+                catchup = page_rounds
+                page_rounds = 0
+                new_since_reload = 0
+        finally:
+            self.page.remove_listener("pageerror", on_page_error)
+        
+        self.log(f"📜 Feed scrolled {rounds} times, {reloads} reloads, pruning mode '{mode}'")
+        return list(post_links.values()), scores
+    
     def scrape_profile_videos(self, profile_url: str) -> List[str]:
         """Scrape video URLs from Threads profile"""
         self.log(f"🔍 Starting profile scrape: {profile_url}")
@@ -387,55 +1266,84 @@ class ThreadsDownloader:
             self.page.goto(profile_url, wait_until="networkidle", timeout=30000)
             self.page.wait_for_timeout(5000)
             
-            # Scroll to load more posts
-            self.log("📜 Scrolling to load posts...")
-            for i in range(15):  # More scrolls for better coverage
-                self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                self.page.wait_for_timeout(2000)
-                if i % 5 == 0:
-                    self.log(f"Scroll {i+1}/15 completed")
-            
-            # Find post links
-            self.log("🔎 Searching for post links...")
-            
-            # Multiple strategies to find post links
-            post_links = set()
-            
-            # Strategy 1: Direct post links
-            links = self.page.locator('a[href*="/post/"]').all()
-            for link in links:
-                href = link.get_attribute('href')
-                if href:
-                    if href.startswith('/'):
-                        href = f"https://www.threads.net{href}"
-                    post_links.add(href)
+            feed_scores = None
+            if self.long_scroll:
+                self.log("📜 Long-scroll mode: scrolling until the feed ends...")
+                post_links, feed_scores = self.long_scroll_feed()
+                self.log(f"📋 Found {len(post_links)} potential posts")
+            else:
+                # Scroll to load more posts
+                self.log("📜 Scrolling to load posts...")
+                for i in range(15):  # More scrolls for better coverage
+                    self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                    self.page.wait_for_timeout(2000)
+                    if i % 5 == 0:
+                        self.log(f"Scroll {i+1}/15 completed")
+                
+                # Find post links
+                self.log("🔎 Searching for post links...")
+                
+                # Multiple strategies to find post links
+                post_links = set()
+                
+                # Strategy 1: Direct post links
+                links = self.page.locator('a[href*="/post/"]').all()
+                for link in links:
+                    href = link.get_attribute('href')
+                    if href:
+                        if href.startswith('/'):
+                            href = f"https://www.threads.net{href}"
+                        post_links.add(href)
+                
+                # Strategy 2: JavaScript extraction
+                try:
+                    js_links = self.page.evaluate("""
+                        () => {
+                            const links = [];
+                            document.querySelectorAll('a').forEach(a => {
+                                if (a.href && a.href.includes('/post/')) {
+                                    links.push(a.href);
+                                }
+                            });
+                            return [...new Set(links)];
+                        }
+                    """)
+                    post_links.update(js_links)
+                except:
+                    pass
+                
+                post_links = list(post_links)
+                self.log(f"📋 Found {len(post_links)} potential posts")
             
-            # Strategy 2: JavaScript extraction
-            try:
-                js_links = self.page.evaluate("""
-                    () => {
-                        const links = [];
-                        document.querySelectorAll('a').forEach(a => {
-                            if (a.href && a.href.includes('/post/')) {
-                                links.push(a.href);
-                            }
-                        });
-                        return [...new Set(links)];
-                    }
-                """)
-                post_links.update(js_links)
-            except:
-                pass
-            
-            post_links = list(post_links)
-            self.log(f"📋 Found {len(post_links)} potential posts")
+            # Prefilter: rank by video markers in the feed, skip cards without any
+            if self.prefilter_videos:
+                try:
+                    scores = feed_scores if feed_scores is not None else self.score_feed_posts()
+                    ranked = []
+                    for post_link in post_links:
+                        post_id_match = re.search(r'/post/([^/?]+)', post_link)
+                        score = scores.get(post_id_match.group(1), 0) if post_id_match else 0
+                        if score >= self.prefilter_min_score:
+                            ranked.append((score, post_link))
+                    ranked.sort(key=lambda item: item[0], reverse=True)
+                    if ranked and ranked[0][0] > 0:
+                        self.log(f"🎯 Prefilter kept {len(ranked)}/{len(post_links)} posts with video markers")
+                        post_links = [post_link for _, post_link in ranked]
+                    else:
+                        # Markup changed or markers not mounted yet: no signal, so check everything
+                        self.log("Prefilter found no video markers, checking all posts", "WARNING")
+                except Exception as e:
+                    self.log(f"Prefilter failed, checking all posts: {e}", "WARNING")
             
             # Check each post for videos
-            for i, post_link in enumerate(post_links[:20], 1):  # Limit to first 20 posts
+            if self.max_posts:
+                post_links = post_links[:self.max_posts]
+            for i, post_link in enumerate(post_links, 1):
                 self.log(f"🔍 Checking post {i}: {post_link}")
                 
                 try:
-                    video_url = self.extract_video_url_from_post(post_link)
+                    with self.trace_post(post_link):
+                        video_url = self.extract_video_url_from_post(post_link)
                     if video_url:
                         self.log(f"✅ Video found in post {i}")
                         video_urls.append(post_link)
@@ -468,24 +1376,21 @@ class ThreadsDownloader:
         return video_urls
     
     def batch_download(self) -> None:
-        """Download videos from input.txt"""
-        if not os.path.exists(self.input_file):
+        """Download videos from input.txt, streaming and deduplicating URLs"""
+        if self.input_file != "-" and not os.path.exists(self.input_file):
             self.log(f"❌ Input file not found: {self.input_file}", "ERROR")
             return
         
-        with open(self.input_file, 'r', encoding='utf-8') as f:
-            urls = [line.strip() for line in f if line.strip()]
-        
-        if not urls:
-            self.log("❌ No URLs found in input file", "ERROR")
-            return
-        
-        self.log(f"🚀 Starting batch download of {len(urls)} videos...")
-        self.init_browser()
+        self.log(f"🚀 Starting batch download from {self.input_file}...")
         
+        total = 0
         success_count = 0
-        for i, url in enumerate(urls, 1):
-            self.log(f"📥 Processing {i}/{len(urls)}: {url}")
+        seen = BloomFilter(self.dedupe_capacity)
+        for url in iter_url_lines(self.input_file, seen):
+            if total == 0:
+                self.init_browser()
+            total += 1
+            self.log(f"📥 Processing {total}: {url}")
             
             if self.download_video(url):
                 success_count += 1
@@ -493,8 +1398,15 @@ class ThreadsDownloader:
             # Rate limiting between downloads
             time.sleep(3)
         
+        if seen.duplicates:
+            self.log(f"⏭️ Skipped {seen.duplicates} duplicate URLs")
+        
+        if total == 0:
+            self.log("❌ No URLs found in input file", "ERROR")
+            return
+        
         self.close_browser()
-        self.log(f"✅ Batch download completed! {success_count}/{len(urls)} successful")
+        self.log(f"✅ Batch download completed! {success_count}/{total} successful")
     
     def run(self):
         """Main application"""
@@ -508,10 +1420,11 @@ class ThreadsDownloader:
         print("3. 🐛 Debug single post (analyze structure)")
         print("4. 🧪 Test single video download")
         print("5. ❌ Exit")
+        print("6. 📊 Show extraction strategy stats")
         print()
         
         while True:
-            choice = input("Enter your choice (1-5): ").strip()
+            choice = input("Enter your choice (1-6): ").strip()
             
             if choice == "1":
                 print("\n" + "="*50)
@@ -539,6 +1452,11 @@ class ThreadsDownloader:
                 print("⬇️ BATCH DOWNLOAD MODE")
                 print("="*50)
                 
+                if self.input_file == "-":
+                    # The menu itself reads from stdin, so the URL list cannot come from there
+                    print("❌ Reading URLs from stdin needs non-interactive mode: --input - --batch")
+                    continue
+                
                 if not os.path.exists(self.input_file):
                     print(f"❌ File '{self.input_file}' not found!")
                     print(f"Create it with video URLs (one per line)")
@@ -592,17 +1510,63 @@ class ThreadsDownloader:
                 print("\n👋 Goodbye!")
                 break
                 
+            elif choice == "6":
+                self.strategy_report()
+                break
+                
             else:
-                print("❌ Invalid choice! Enter 1-5.")
+                print("❌ Invalid choice! Enter 1-6.")
 
 def main():
+    parser = argparse.ArgumentParser(description="Threads Video Downloader & Scraper")
+    parser.add_argument('--input', metavar='FILE',
+                        help="URL list for batch download: plain file, .gz, or '-' for stdin (default: input.txt)")
+    parser.add_argument('--batch', action='store_true',
+                        help="Run the batch download directly instead of showing the menu")
+    parser.add_argument('--dedupe-capacity', type=int, default=1_000_000, metavar='N',
+                        help="Initial capacity of the URL dedupe filter (grows as needed)")
+    parser.add_argument('--long-scroll', action='store_true',
+                        help="Scroll profiles until the feed ends, keeping browser memory flat (implies --max-posts 0)")
+    parser.add_argument('--heap-limit-mb', type=int, default=512, metavar='MB',
+                        help="JS heap size that triggers a page reload in long-scroll mode (default: 512)")
+    parser.add_argument('--max-posts', type=int, metavar='N',
+                        help="Posts resolved per profile scrape, 0 = no limit (default: 20, or 0 with --long-scroll)")
+    parser.add_argument('--trace', nargs='?', const='threads_trace.json', metavar='FILE',
+                        help="Record per-post spans as Chrome trace-event JSON (default: threads_trace.json)")
+    parser.add_argument('--trace-slowest', type=int, default=0, metavar='N',
+                        help="Also keep Playwright traces of the N slowest posts in traces/")
+    args = parser.parse_args()
+    if args.input == '-' and not args.batch:
+        parser.error("--input - (stdin) requires --batch; the menu reads its choices from stdin")
+    
+    downloader = None
     try:
         downloader = ThreadsDownloader()
-        downloader.run()
+        if args.trace:
+            downloader.tracer.enabled = True
+            downloader.trace_file = args.trace
+        downloader.trace_slowest = args.trace_slowest
+        if args.input:
+            downloader.input_file = args.input
+        downloader.dedupe_capacity = args.dedupe_capacity
+        downloader.long_scroll = args.long_scroll
+        downloader.heap_limit_mb = args.heap_limit_mb
+        if args.max_posts is not None:
+            downloader.max_posts = args.max_posts
+        elif args.long_scroll:
+            downloader.max_posts = 0
+        if args.batch:
+            downloader.batch_download()
+        else:
+            downloader.run()
     except KeyboardInterrupt:
         print("\n\n⏹️ Interrupted by user")
     except Exception as e:
         print(f"\n❌ Unexpected error: {e}")
+    finally:
+        if downloader and downloader.tracer.enabled:
+            downloader.tracer.save(downloader.trace_file)
+            print(f"🧭 Trace saved to {downloader.trace_file} (open in chrome://tracing or ui.perfetto.dev)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file